@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Benchmark convert_tech_proposal on synthetic proposal markdown.
+
+Generates markdown in the dialect process_markdown handles (headings, pipe
+tables, code fences, bullets, **Key:** lines, notes, inline markup) plus
+synthetic PNG figures, then times tokenizing, rendering and saving
+separately and prints the results as JSON.
+
+Usage:
+    python bench_proposal.py [--sizes 1000,5000,20000] [--stream]
+                             [--output FILE] [--baseline FILE] [--tolerance 0.25]
+
+Rendering time grows faster than the line count, so the default sizes stop
+at 20000 lines; pass larger ones (--sizes 50000,200000) explicitly.
+
+With --baseline, each phase is compared against a previous JSON result of
+the same size and the script exits with status 1 if any phase got slower
+than the tolerance allows.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import struct
+import sys
+import tempfile
+import time
+import zlib
+
+import convert_tech_proposal as ctp
+
+DEFAULT_SIZES = [1000, 5000, 20000]
+FIGURE_EVERY = 5  # one figure anchor per this many H3 subsections
+
+WORDS = ('broadband qos latency jitter packet loss throughput netflow snmp isp '
+         'nttn backbone probe dashboard alert threshold region upazila kafka '
+         'clickhouse ingestion pipeline compliance regulator report').split()
+
+def make_png(width, height, seed):
+    """A small RGB PNG with a seeded gradient, built without any image library."""
+    rng = random.Random(seed)
+    r0, g0, b0 = rng.randrange(256), rng.randrange(256), rng.randrange(256)
+    base = bytes(v for x in range(width + height)
+                 for v in ((r0 + x) & 255, (g0 + 2 * x) & 255, (b0 + 3 * x) & 255))
+    # Filter byte 0 (none) followed by the gradient shifted one pixel per row
+    rows = [b'\x00' + base[3 * y:3 * (y + width)] for y in range(height)]
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body))
+
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', ihdr)
+            + chunk(b'IDAT', zlib.compress(b''.join(rows), 6)) + chunk(b'IEND', b''))
+
+def sentence(rng, words=12):
+    text = ' '.join(rng.choice(WORDS) for _ in range(words))
+    roll = rng.random()
+    if roll < 0.2:
+        text += f" with **{rng.choice(WORDS)} {rng.choice(WORDS)}**"
+    elif roll < 0.3:
+        text += f" via `{rng.choice(WORDS)}-{rng.randrange(100)}`"
+    elif roll < 0.35:
+        text += f" (see [{rng.choice(WORDS)}](https://example.org/{rng.randrange(1000)}))"
+    return text[0].upper() + text[1:] + '.'
+
+def make_markdown(target_lines, seed=1):
+    """Synthetic proposal markdown of about `target_lines` lines.
+
+    Returns (markdown, anchors) where anchors are the H3 headings that get
+    figures attached.
+    """
+    rng = random.Random(seed)
+    lines = ['# Technical Proposal', '', sentence(rng), '']
+    anchors = []
+    section = 0
+    while len(lines) < target_lines:
+        section += 1
+        lines += [f"## {section}. {sentence(rng, 3)[:-1]}", '', sentence(rng), '']
+        for sub in range(1, 6):
+            heading = f"{section}.{sub} {sentence(rng, 3)[:-1]}"
+            lines += [f"### {heading}", '']
+            if (section * 5 + sub) % FIGURE_EVERY == 0:
+                anchors.append(heading)
+            block = rng.randrange(6)
+            if block == 0:
+                lines += ['| Component | Technology | Purpose |', '|---|---|---|']
+                lines += [f"| **{rng.choice(WORDS)}** | `{rng.choice(WORDS)}` | {sentence(rng, 6)} |"
+                          for _ in range(rng.randrange(3, 12))]
+            elif block == 1:
+                lines += ['```'] + [f"{rng.choice(WORDS)} -> {rng.choice(WORDS)}"
+                                    for _ in range(rng.randrange(3, 10))] + ['```']
+            elif block == 2:
+                lines += [f"- {sentence(rng, 8)}" for _ in range(rng.randrange(3, 8))]
+            elif block == 3:
+                lines += [f"**{rng.choice(WORDS).title()}:** {sentence(rng, 6)}"
+                          for _ in range(rng.randrange(2, 6))]
+            elif block == 4:
+                lines += [f"*{sentence(rng, 10)}*"]
+            else:
+                lines += [sentence(rng, 20) for _ in range(rng.randrange(1, 4))]
+            lines.append('')
+        lines += ['---', '']
+    return '\n'.join(lines[:target_lines]), anchors
+
+def run_size(target_lines, work_dir, stream=False):
+    """Time one full conversion of `target_lines` of synthetic markdown."""
+    md_content, anchors = make_markdown(target_lines)
+
+    ctp.IMAGES.clear()
+    for i, heading in enumerate(anchors):
+        path = os.path.join(work_dir, f"figure-{i}.png")
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(make_png(320, 180, i))
+        ctp.IMAGES[heading] = [(path[:-4], f"Figure {i + 1}: {heading}")]
+    ctp._figure_matcher = None
+    ctp.IMAGE_INDEX = ctp.ImageIndex()  # pick up the figures written above
+
+    output = os.path.join(work_dir, f"proposal-{target_lines}.docx")
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        tokens = list(ctp.tokenize_markdown(md_content))
+        tokenized = time.perf_counter()
+
+        doc = ctp.new_document()
+        writer = ctp.StreamingDocxWriter(doc, output) if stream else None
+        ctp.render_tokens(doc, tokens, writer.flush if writer else None)
+        rendered = time.perf_counter()
+
+        if writer:
+            writer.close()
+        else:
+            ctp.save_docx(doc, output)
+        saved = time.perf_counter()
+
+    return {
+        'lines': target_lines,
+        'stream': stream,
+        'blocks': len(tokens),
+        'figures': len(anchors),
+        'tokenize_s': round(tokenized - start, 4),
+        'render_s': round(rendered - tokenized, 4),
+        'save_s': round(saved - rendered, 4),
+        'docx_bytes': os.path.getsize(output),
+    }
+
+def compare(results, baseline, tolerance):
+    """Return a message for every phase slower than baseline * (1 + tolerance)."""
+    previous = {(r['lines'], r.get('stream', False)): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        old = previous.get((result['lines'], result['stream']))
+        if not old:
+            continue
+        for phase in ('tokenize_s', 'render_s', 'save_s'):
+            if old[phase] > 0 and result[phase] > old[phase] * (1 + tolerance):
+                regressions.append(f"{result['lines']} lines {phase}: "
+                                   f"{old[phase]:.3f}s -> {result[phase]:.3f}s")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated markdown sizes in lines")
+    parser.add_argument('--stream', action='store_true',
+                        help="render through StreamingDocxWriter; the save phase is its close()")
+    parser.add_argument('--output', help="also write the JSON results to this file")
+    parser.add_argument('--baseline', help="previous JSON results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown per phase before failing (default 0.25)")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for size in (int(s) for s in args.sizes.split(',')):
+            results.append(run_size(size, work_dir, args.stream))
+            print(f"{size} lines done", file=sys.stderr)
+
+    report = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for message in regressions:
+            print(f"Regression: {message}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
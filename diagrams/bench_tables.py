@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Benchmark add_table_from_md against the old per-cell python-docx table writer.
+
+Usage: python bench_tables.py [--all] [ROWS ...]   (default: 10 1000 10000)
+
+The old writer is quadratic in the row count (every table.rows access
+rebuilds the row list), so it is only timed up to LEGACY_MAX_ROWS unless
+--all is given.
+"""
+
+import sys
+import time
+
+from docx.enum.table import WD_TABLE_ALIGNMENT
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import Pt, RGBColor
+
+from convert_tech_proposal import add_table_from_md, new_document
+
+LEGACY_MAX_ROWS = 2000
+
+COLUMNS = ['Requirement', 'Clause', 'Compliance', 'Remarks']
+
+def make_table(rows):
+    """Markdown table in the style of the compliance appendices."""
+    lines = ['| ' + ' | '.join(f"**{c}**" for c in COLUMNS) + ' |',
+             '|' + '---|' * len(COLUMNS)]
+    for i in range(rows):
+        lines.append(f"| REQ-{i:05d} | 3.{i % 40}.{i % 7} | **Complied** | "
+                     f"Supported by `module-{i % 13}` with HA deployment |")
+    return '\n'.join(lines)
+
+def legacy_add_table_from_md(doc, table_text):
+    """The per-cell writer add_table_from_md replaced, kept as the baseline."""
+    lines = [l.strip() for l in table_text.strip().split('\n') if l.strip()]
+    headers = [c.strip() for c in lines[0].split('|') if c.strip()]
+    rows = [[c.strip() for c in line.split('|') if c.strip()] for line in lines[2:]]
+
+    table = doc.add_table(rows=1 + len(rows), cols=len(headers))
+    table.style = 'Table Grid'
+    table.alignment = WD_TABLE_ALIGNMENT.CENTER
+
+    for i, header in enumerate(headers):
+        cell = table.rows[0].cells[i]
+        cell.text = header.replace('**', '')
+        shading = OxmlElement('w:shd')
+        shading.set(qn('w:fill'), '1F2937')
+        cell._tc.get_or_add_tcPr().append(shading)
+        for para in cell.paragraphs:
+            for run in para.runs:
+                run.font.bold = True
+                run.font.color.rgb = RGBColor(255, 255, 255)
+                run.font.size = Pt(9)
+
+    for r_idx, row in enumerate(rows):
+        for c_idx, cell_text in enumerate(row):
+            cell = table.rows[r_idx + 1].cells[c_idx]
+            cell.text = cell_text.replace('**', '').replace('`', '')
+            for para in cell.paragraphs:
+                for run in para.runs:
+                    run.font.size = Pt(9)
+
+    doc.add_paragraph()
+
+def time_writer(writer, table_text):
+    doc = new_document()
+    start = time.perf_counter()
+    writer(doc, table_text)
+    return time.perf_counter() - start
+
+def main():
+    args = sys.argv[1:]
+    run_all = '--all' in args
+    sizes = [int(arg) for arg in args if arg != '--all'] or [10, 1000, 10000]
+
+    print(f"{'rows':>8}  {'per-cell':>10}  {'bulk':>10}  {'speedup':>8}")
+    for rows in sizes:
+        table_text = make_table(rows)
+        bulk = time_writer(add_table_from_md, table_text)
+        if run_all or rows <= LEGACY_MAX_ROWS:
+            legacy = time_writer(legacy_add_table_from_md, table_text)
+            print(f"{rows:>8}  {legacy:>9.3f}s  {bulk:>9.3f}s  {legacy / bulk:>7.1f}x")
+        else:
+            print(f"{rows:>8}  {'skipped':>10}  {bulk:>9.3f}s  {'-':>8}")
+
+if __name__ == '__main__':
+    main()
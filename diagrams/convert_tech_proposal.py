@@ -1,20 +1,39 @@
 #!/usr/bin/env python3
 """Convert Technical Proposal markdown to Word with images."""
 
+import argparse
+import hashlib
+import json
 import re
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
 from docx import Document
-from docx.shared import Inches, Pt, RGBColor
+from docx.shared import Emu, Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.enum.table import WD_TABLE_ALIGNMENT
-from docx.oxml.ns import qn
-from docx.oxml import OxmlElement
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml.ns import nsdecls, qn
+from docx.oxml import OxmlElement, parse_xml
 import os
 
+from docx_fragments import FragmentStitcher, capture_fragment, load_fragment, save_fragment
+from docx_package import DEFAULT_XML_LEVEL, save_docx
+from docx_stream import StreamingDocxWriter
+from image_meta import fit_size, image_size, load_cache, save_cache
+
 # Paths
 BASE_DIR = "/home/mustafa/Dropbox/Telcobright Customers Work/BTRC/BroadbandPeformanceMonitoringEOI"
 MD_FILE = f"{BASE_DIR}/diagrams/Project Understanding Summary-2 (Technical Proposal).md"
 OUTPUT_FILE = f"{BASE_DIR}/diagrams/Technical-Proposal.docx"
 SCREENSHOTS_DIR = f"{BASE_DIR}/submission/doc/final-zip/specific-exp-cisp/screenshots"
+CACHE_DIR = f"{BASE_DIR}/diagrams/.proposal-cache"
+# Local modules rendering goes through; editing one invalidates CACHE_DIR like editing this file
+RENDER_MODULES = ('docx_fragments.py', 'docx_media.py', 'docx_package.py', 'docx_stream.py',
+                  'image_meta.py')
+
+# Letter page less 1" margins is 9" tall; leave room for the caption
+MAX_IMAGE_HEIGHT = 8.0
 
 # Image mapping: section keyword -> list of (image file, caption)
 BPMN_DIR = f"{BASE_DIR}/diagrams"
@@ -34,14 +53,209 @@ IMAGES = {
     ],
 }
 
-def set_cell_shading(cell, color):
-    """Set cell background color."""
-    shading = OxmlElement('w:shd')
-    shading.set(qn('w:fill'), color)
-    cell._tc.get_or_add_tcPr().append(shading)
+class FigureMatcher:
+    """Aho-Corasick automaton over the IMAGES keys.
+
+    Built once, it finds every key occurring in a heading in a single pass
+    over the heading, however many keys there are.
+    """
+
+    def __init__(self, mapping):
+        self._keys = []
+        self._figures = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for key, img_list in mapping.items():
+            if not key:
+                continue
+            state = 0
+            for ch in key:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(len(self._keys))
+            self._keys.append(key)
+            self._figures.append(img_list)
+
+        # Breadth-first pass to set failure links
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def match(self, text):
+        """Return the figure lists of all keys in `text`, in order of position."""
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = {}
+        state = 0
+        for pos, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for idx in out[state]:
+                hits.setdefault(idx, pos - len(self._keys[idx]) + 1)
+        ordered = sorted(hits, key=lambda idx: (hits[idx], idx))
+        return [self._figures[idx] for idx in ordered]
+
+_figure_matcher = None
+
+def figure_matcher():
+    """The FigureMatcher for the current IMAGES mapping."""
+    global _figure_matcher
+    if _figure_matcher is None:
+        _figure_matcher = FigureMatcher(IMAGES)
+    return _figure_matcher
+
+def load_image_map(path):
+    """Add figure anchors from a JSON mapping file to IMAGES.
+
+    The file maps a heading keyword to a list of [image path, caption]
+    pairs; relative image paths are taken from BASE_DIR.
+    """
+    global _figure_matcher
+    with open(path, 'r', encoding='utf-8') as f:
+        mapping = json.load(f)
+    for key, img_list in mapping.items():
+        IMAGES[key] = [(os.path.join(BASE_DIR, img_path), caption)
+                       for img_path, caption in img_list]
+    _figure_matcher = None
+    print(f"Loaded {len(mapping)} figure anchors from {path}")
+
+# Inline markdown - **bold**, *italic*, `code` and [label](url) - in one scan
+INLINE_RE = re.compile(
+    r'\*\*(?P<bold>.+?)\*\*'
+    r'|`(?P<code>[^`]+)`'
+    r'|\[(?P<label>[^\]]+)\]\((?P<url>[^)\s]+)\)'
+    r'|(?<![\w*])\*(?P<italic>[^*\s](?:[^*]*[^*\s])?)\*(?![\w*])'
+)
+CODE_FONT = 'Courier New'
+HYPERLINK_COLOR = '0563C1'
+
+InlineRun = namedtuple('InlineRun', ['text', 'bold', 'italic', 'code', 'url'])
+
+# Run templates for paragraph text and italic notes
+PLAIN_RUN = parse_xml(f'<w:r {nsdecls("w")}><w:t/></w:r>')
+NOTE_RUN = parse_xml(f'<w:r {nsdecls("w")}><w:rPr><w:i/><w:sz w:val="18"/></w:rPr><w:t/></w:r>')
+
+def lex_inline(text, bold=False, italic=False, url=None):
+    """Split a line of markdown into InlineRuns in one left-to-right scan.
+
+    Bold, italic and link text is lexed again for markup nested inside it.
+    Stray backticks in plain text are dropped.
+    """
+    runs = []
+    pos = 0
+    for m in INLINE_RE.finditer(text):
+        if m.start() > pos:
+            runs.append(InlineRun(text[pos:m.start()].replace('`', ''), bold, italic, False, url))
+        kind = m.lastgroup
+        if kind == 'code':
+            runs.append(InlineRun(m.group('code'), bold, italic, True, url))
+        elif kind == 'bold':
+            runs.extend(lex_inline(m.group('bold'), True, italic, url))
+        elif kind == 'italic':
+            runs.extend(lex_inline(m.group('italic'), bold, True, url))
+        else:
+            runs.extend(lex_inline(m.group('label'), bold, italic, m.group('url')))
+        pos = m.end()
+    if pos < len(text):
+        runs.append(InlineRun(text[pos:].replace('`', ''), bold, italic, False, url))
+    return [run for run in runs if run.text]
+
+def set_run_text(r, text):
+    """Put text into a cloned run template ending in an empty w:t."""
+    t = r[-1]
+    if '\t' in text or '\n' in text:
+        r.remove(t)
+        r.text = text  # python-docx turns these into w:tab / w:br
+        return
+    t.text = text
+    if text[0].isspace() or text[-1].isspace():
+        t.set(qn('xml:space'), 'preserve')
+
+def append_inline(p, part, text, run_template=PLAIN_RUN):
+    """Append a line of inline markdown to a w:p as styled runs.
+
+    Links become w:hyperlink elements with an external relationship on
+    `part`.
+    """
+    for run in lex_inline(text):
+        r = deepcopy(run_template)
+        set_run_text(r, run.text)
+        if run.code or run.bold or run.italic or run.url:
+            rPr = r.get_or_add_rPr()
+            if run.code:
+                fonts = rPr.get_or_add_rFonts()
+                fonts.set(qn('w:ascii'), CODE_FONT)
+                fonts.set(qn('w:hAnsi'), CODE_FONT)
+            if run.bold:
+                rPr.get_or_add_b()
+            if run.italic:
+                rPr.get_or_add_i()
+            if run.url:
+                rPr.get_or_add_color().set(qn('w:val'), HYPERLINK_COLOR)
+                rPr.get_or_add_u().set(qn('w:val'), 'single')
+        if run.url:
+            hyperlink = OxmlElement('w:hyperlink')
+            hyperlink.set(qn('r:id'), part.relate_to(run.url, RT.HYPERLINK, is_external=True))
+            hyperlink.append(r)
+            p.append(hyperlink)
+        else:
+            p.append(r)
+
+# Table look shared by every markdown table
+TABLE_HEADER_FILL = '1F2937'
+TABLE_FONT_SIZE = 18  # half-points, i.e. 9pt
+
+def table_templates(cols, col_twips):
+    """Prebuilt w:tbl, header row, data row and run elements to clone from."""
+    w = nsdecls('w')
+    grid_col = f'<w:gridCol w:w="{col_twips}"/>'
+    tbl = parse_xml(
+        f'<w:tbl {w}><w:tblPr><w:tblStyle w:val="TableGrid"/>'
+        f'<w:tblW w:type="auto" w:w="0"/><w:jc w:val="center"/>'
+        f'<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0"'
+        f' w:noHBand="0" w:noVBand="1" w:val="04A0"/></w:tblPr>'
+        f'<w:tblGrid>{grid_col * cols}</w:tblGrid></w:tbl>'
+    )
+    header_cell = (f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{col_twips}"/>'
+                   f'<w:shd w:fill="{TABLE_HEADER_FILL}"/></w:tcPr><w:p/></w:tc>')
+    data_cell = f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{col_twips}"/></w:tcPr><w:p/></w:tc>'
+    header_row = parse_xml(f'<w:tr {w}>{header_cell * cols}</w:tr>')
+    data_row = parse_xml(f'<w:tr {w}>{data_cell * cols}</w:tr>')
+    header_run = parse_xml(
+        f'<w:r {w}><w:rPr><w:b/><w:color w:val="FFFFFF"/>'
+        f'<w:sz w:val="{TABLE_FONT_SIZE}"/></w:rPr><w:t/></w:r>'
+    )
+    data_run = parse_xml(f'<w:r {w}><w:rPr><w:sz w:val="{TABLE_FONT_SIZE}"/></w:rPr><w:t/></w:r>')
+    return tbl, header_row, data_row, header_run, data_run
+
+def fill_row(row_template, run_template, texts, part):
+    """Clone a row template and fill its leading cells with inline markdown."""
+    tr = deepcopy(row_template)
+    for tc, text in zip(tr, texts):
+        append_inline(tc[-1], part, text, run_template)
+    return tr
 
 def add_table_from_md(doc, table_text):
-    """Parse markdown table and add to document."""
+    """Parse markdown table and add to document.
+
+    The w:tbl is assembled directly from cloned row and run templates rather
+    than cell by cell through python-docx, which matters for long tables.
+    """
     lines = [l.strip() for l in table_text.strip().split('\n') if l.strip()]
     if len(lines) < 2:
         return
@@ -58,193 +272,242 @@ def add_table_from_md(doc, table_text):
     if not headers:
         return
 
-    # Create table
-    table = doc.add_table(rows=1 + len(rows), cols=len(headers))
-    table.style = 'Table Grid'
-    table.alignment = WD_TABLE_ALIGNMENT.CENTER
-
-    # Header row
-    for i, header in enumerate(headers):
-        cell = table.rows[0].cells[i]
-        cell.text = header.replace('**', '')
-        set_cell_shading(cell, '1F2937')
-        for para in cell.paragraphs:
-            for run in para.runs:
-                run.font.bold = True
-                run.font.color.rgb = RGBColor(255, 255, 255)
-                run.font.size = Pt(9)
-
-    # Data rows
-    for r_idx, row in enumerate(rows):
-        for c_idx, cell_text in enumerate(row):
-            if c_idx < len(table.columns):
-                cell = table.rows[r_idx + 1].cells[c_idx]
-                # Clean markdown formatting
-                clean_text = cell_text.replace('**', '').replace('`', '')
-                cell.text = clean_text
-                for para in cell.paragraphs:
-                    for run in para.runs:
-                        run.font.size = Pt(9)
-
-    doc.add_paragraph()
-
-def add_image(doc, image_path, caption=None, width=6.0):
-    """Add image with caption."""
-    # Try common extensions
-    for ext in ['', '.png', '.jpg', '.jpeg', '.PNG', '.JPG']:
-        full_path = image_path + ext
-        if os.path.exists(full_path):
-            para = doc.add_paragraph()
-            para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            run = para.add_run()
-            run.add_picture(full_path, width=Inches(width))
-
-            if caption:
-                cap_para = doc.add_paragraph()
-                cap_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                cap_run = cap_para.add_run(caption)
-                cap_run.font.size = Pt(9)
-                cap_run.font.italic = True
-            return True
-    return False
-
-def process_markdown(doc, md_content):
-    """Process markdown content and add to document."""
-    lines = md_content.split('\n')
-    i = 0
-    current_section = ""
+    cols = len(headers)
+    col_twips = Emu(doc._block_width // cols).twips
+    tbl, header_row, data_row, header_run, data_run = table_templates(cols, col_twips)
 
-    while i < len(lines):
-        line = lines[i]
+    # Header row, then data rows; extra cells are dropped
+    tbl.append(fill_row(header_row, header_run, headers, doc.part))
+    for row in rows:
+        tbl.append(fill_row(data_row, data_run, row[:cols], doc.part))
 
-        # Skip empty lines
-        if not line.strip():
-            i += 1
-            continue
-
-        # Skip horizontal rules
-        if line.strip() == '---':
-            i += 1
-            continue
+    doc.element.body._insert_tbl(tbl)
+    doc.add_paragraph()
 
-        # H1 - Title
-        if line.startswith('# '):
-            title = line[2:].strip()
-            para = doc.add_heading(title, level=0)
-            para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            i += 1
-            continue
+# Extensions tried, in order, when an image is named without one
+IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg']
+
+class ImageIndex:
+    """Case-insensitive basename -> path index over image directories.
+
+    Each directory is listed once with os.scandir on first use; lookups after
+    that never touch the filesystem. A file is indexed under its full name
+    and, for known image extensions, under its name without the extension.
+    """
+
+    def __init__(self):
+        self._dirs = {}
+
+    def _scan(self, directory):
+        index = self._dirs.get(directory)
+        if index is None:
+            index = {}
+            if os.path.isdir(directory):
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if not entry.is_file():
+                            continue
+                        name = entry.name.lower()
+                        index.setdefault(name, []).append(entry.path)
+                        stem, ext = os.path.splitext(name)
+                        if ext in IMAGE_EXTENSIONS:
+                            index.setdefault(stem, []).append(entry.path)
+            self._dirs[directory] = index
+        return index
+
+    def candidates(self, image_path):
+        """All files matching a path, best match first."""
+        directory, name = os.path.split(image_path)
+
+        def rank(path):
+            base = os.path.basename(path)
+            ext = os.path.splitext(base)[1].lower()
+            ext_rank = IMAGE_EXTENSIONS.index(ext) if ext in IMAGE_EXTENSIONS else -1
+            return (base.lower() != name.lower(), base != name, ext_rank, base)
+
+        return sorted(self._scan(directory).get(name.lower(), []), key=rank)
+
+    def resolve(self, image_path):
+        """Return the best matching file for a path, or None."""
+        matches = self.candidates(image_path)
+        return matches[0] if matches else None
+
+IMAGE_INDEX = ImageIndex()
+
+def find_image(image_path):
+    """Return the image file for a path given with or without extension."""
+    return IMAGE_INDEX.resolve(image_path)
+
+def check_images():
+    """Report missing and ambiguous IMAGES entries before rendering starts."""
+    ok = True
+    for key, img_list in IMAGES.items():
+        for img_path, caption in img_list:
+            matches = IMAGE_INDEX.candidates(img_path)
+            if not matches:
+                print(f"Warning: image not found for '{key}': {img_path}")
+                ok = False
+            elif len(matches) > 1:
+                names = ', '.join(os.path.basename(m) for m in matches)
+                print(f"Warning: ambiguous image for '{key}': {img_path} "
+                      f"matches {names}; using {os.path.basename(matches[0])}")
+    return ok
 
-        # H2 - Major sections
-        if line.startswith('## '):
-            section = line[3:].strip()
-            current_section = section
-            doc.add_heading(section, level=1)
-
-            # Check for image insertion
-            for key, img_list in IMAGES.items():
-                if key in section:
-                    for img_path, caption in img_list:
-                        doc.add_paragraph()
-                        if add_image(doc, img_path, caption):
-                            print(f"Added image: {caption}")
-            i += 1
-            continue
-
-        # H3 - Subsections
-        if line.startswith('### '):
-            subsection = line[4:].strip()
-            doc.add_heading(subsection, level=2)
-
-            # Check for image insertion
-            for key, img_list in IMAGES.items():
-                if key in subsection:
-                    for img_path, caption in img_list:
-                        doc.add_paragraph()
-                        if add_image(doc, img_path, caption):
-                            print(f"Added image: {caption}")
-            i += 1
+def add_image(doc, image_path, caption=None, width=6.0):
+    """Add image with caption, `width` inches wide unless that's taller than a page."""
+    full_path = find_image(image_path)
+    if full_path is None:
+        return False
+
+    para = doc.add_paragraph()
+    para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    run = para.add_run()
+    run.add_picture(full_path, **fit_size(image_size(full_path), Inches(width),
+                                          Inches(MAX_IMAGE_HEIGHT)))
+
+    if caption:
+        cap_para = doc.add_paragraph()
+        cap_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        cap_run = cap_para.add_run(caption)
+        cap_run.font.size = Pt(9)
+        cap_run.font.italic = True
+    return True
+
+# Block-level patterns, compiled once and shared by every line
+HEADING_RE = re.compile(r'(#{1,4}) (.*)')
+FENCE_RE = re.compile(r'\s*```')
+BULLET_RE = re.compile(r'[-*] ')
+KEY_VALUE_RE = re.compile(r'\*\*(.+?):\*\*(.*)')  # "**Key:** value"
+
+# Token kinds produced by tokenize_markdown()
+HEADING = 'heading'
+TABLE = 'table'
+CODE = 'code'
+BULLET = 'bullet'
+KEY_VALUE = 'key_value'
+NOTE = 'note'
+PARAGRAPH = 'paragraph'
+
+Token = namedtuple('Token', ['kind', 'text', 'level', 'lines'])
+
+def tokenize_markdown(md_content):
+    """Yield block tokens from markdown in a single forward pass.
+
+    Headings carry their level (1 for '#' .. 4 for '####') and tables and
+    code fences carry their raw lines. Key/value lines put the key in `text`
+    and the value in `lines[0]`; the remaining kinds only use `text`.
+    """
+    lines = iter(md_content.split('\n'))
+    pending = None  # one line of lookahead, needed to spot table separators
+
+    while True:
+        if pending is not None:
+            line, pending = pending, None
+        else:
+            line = next(lines, None)
+            if line is None:
+                return
+
+        stripped = line.strip()
+
+        # Skip empty lines and horizontal rules
+        if not stripped or stripped == '---':
             continue
 
-        # H4 - Sub-subsections
-        if line.startswith('#### '):
-            subsubsection = line[5:].strip()
-            doc.add_heading(subsubsection, level=3)
-            i += 1
+        m = HEADING_RE.match(line)
+        if m:
+            yield Token(HEADING, m.group(2).strip(), len(m.group(1)), ())
             continue
 
-        # Code blocks
-        if line.strip().startswith('```'):
+        if FENCE_RE.match(line):
             code_lines = []
-            i += 1
-            while i < len(lines) and not lines[i].strip().startswith('```'):
-                code_lines.append(lines[i])
-                i += 1
+            for code_line in lines:
+                if FENCE_RE.match(code_line):
+                    break
+                code_lines.append(code_line)
             if code_lines:
-                code_para = doc.add_paragraph()
-                code_para.style = 'No Spacing'
-                for code_line in code_lines:
-                    run = code_para.add_run(code_line + '\n')
-                    run.font.name = 'Courier New'
-                    run.font.size = Pt(8)
-            i += 1
+                yield Token(CODE, '', 0, code_lines)
             continue
 
-        # Tables
-        if '|' in line and i + 1 < len(lines) and '---' in lines[i + 1]:
-            table_lines = [line]
-            i += 1
-            while i < len(lines) and '|' in lines[i]:
-                table_lines.append(lines[i])
-                i += 1
-            add_table_from_md(doc, '\n'.join(table_lines))
-            continue
-
-        # Bullet points
-        if line.strip().startswith('- ') or line.strip().startswith('* '):
-            bullet_text = line.strip()[2:]
-            # Clean markdown formatting
-            bullet_text = re.sub(r'\*\*(.+?)\*\*', r'\1', bullet_text)
-            bullet_text = bullet_text.replace('`', '')
-            para = doc.add_paragraph(bullet_text, style='List Bullet')
+        if '|' in line:
+            pending = next(lines, None)
+            if pending is not None and '---' in pending:
+                table_lines = [line]
+                while pending is not None and '|' in pending:
+                    table_lines.append(pending)
+                    pending = next(lines, None)
+                yield Token(TABLE, '', 0, table_lines)
+                continue
+
+        if BULLET_RE.match(stripped):
+            yield Token(BULLET, stripped[2:], 0, ())
+        elif stripped.startswith('**') and ':**' in line:
+            # Only the key's delimiters go; the value keeps its inline markup
+            key, value = KEY_VALUE_RE.match(stripped).groups()
+            yield Token(KEY_VALUE, key.replace('**', ''), 0, (value.strip(),))
+        elif stripped.startswith('*') and stripped.endswith('*') and not stripped.startswith('**'):
+            yield Token(NOTE, stripped[1:-1], 0, ())
+        else:
+            yield Token(PARAGRAPH, stripped, 0, ())
+
+def add_section_images(doc, heading):
+    """Insert the IMAGES registered for a heading."""
+    for img_list in figure_matcher().match(heading):
+        for img_path, caption in img_list:
+            doc.add_paragraph()
+            if add_image(doc, img_path, caption):
+                print(f"Added image: {caption}")
+
+def render_tokens(doc, tokens, flush=None):
+    """Render block tokens from tokenize_markdown() into the document.
+
+    `flush`, if given, is called after each block (see --stream).
+    """
+    for token in tokens:
+        if flush:
+            flush()
+        kind = token.kind
+
+        if kind == HEADING:
+            para = doc.add_heading(token.text, level=token.level - 1)
+            if token.level == 1:
+                para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            elif token.level in (2, 3):
+                add_section_images(doc, token.text)
+
+        elif kind == CODE:
+            code_para = doc.add_paragraph()
+            code_para.style = 'No Spacing'
+            for code_line in token.lines:
+                run = code_para.add_run(code_line + '\n')
+                run.font.name = 'Courier New'
+                run.font.size = Pt(8)
+
+        elif kind == TABLE:
+            add_table_from_md(doc, '\n'.join(token.lines))
+
+        elif kind == BULLET:
+            para = doc.add_paragraph(style='List Bullet')
+            append_inline(para._p, doc.part, token.text)
             para.paragraph_format.left_indent = Inches(0.25)
-            i += 1
-            continue
 
-        # Bold text lines (like **Project:** ...)
-        if line.strip().startswith('**') and ':**' in line:
-            clean_line = line.strip().replace('**', '')
+        elif kind == KEY_VALUE:
             para = doc.add_paragraph()
-            parts = clean_line.split(':', 1)
-            if len(parts) == 2:
-                run = para.add_run(parts[0] + ':')
-                run.bold = True
-                para.add_run(' ' + parts[1].strip())
-            else:
-                para.add_run(clean_line)
-            i += 1
-            continue
+            run = para.add_run(token.text + ':')
+            run.bold = True
+            append_inline(para._p, doc.part, ' ' + token.lines[0])
 
-        # Italic notes (*text*)
-        if line.strip().startswith('*') and line.strip().endswith('*') and not line.strip().startswith('**'):
-            text = line.strip()[1:-1]
+        elif kind == NOTE:
             para = doc.add_paragraph()
-            run = para.add_run(text)
-            run.italic = True
-            run.font.size = Pt(9)
-            i += 1
-            continue
+            append_inline(para._p, doc.part, token.text, NOTE_RUN)
 
-        # Regular paragraph
-        text = line.strip()
-        if text:
-            # Clean markdown formatting
-            text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
-            text = text.replace('`', '')
-            text = re.sub(r'\[(.+?)\]\(.+?\)', r'\1', text)  # Remove links
-            para = doc.add_paragraph(text)
+        else:
+            para = doc.add_paragraph()
+            append_inline(para._p, doc.part, token.text)
 
-        i += 1
+def process_markdown(doc, md_content):
+    """Process markdown content and add to document."""
+    render_tokens(doc, tokenize_markdown(md_content))
 
 def add_table_of_contents(doc):
     """Add a Table of Contents field to the document."""
@@ -270,20 +533,157 @@ def add_table_of_contents(doc):
     run._r.append(fldChar2)
     run._r.append(fldChar3)
 
-def main():
+def new_document():
+    """Create an empty document with the proposal's default font."""
+    doc = Document()
+
+    # Set default font
+    style = doc.styles['Normal']
+    style.font.name = 'Arial'
+    style.font.size = Pt(10)
+    return doc
+
+def split_sections(md_content):
+    """Split markdown into the preamble and one chunk per '## ' section."""
+    sections = [[]]
+    in_code = False
+    for line in md_content.split('\n'):
+        if FENCE_RE.match(line):
+            in_code = not in_code
+        elif not in_code and line.startswith('## '):
+            sections.append([])
+        sections[-1].append(line)
+    return ['\n'.join(lines) for lines in sections]
+
+def section_images(section_text):
+    """Return (image file, caption) for each figure IMAGES attaches to the headings of a section."""
+    figures = []
+    for token in tokenize_markdown(section_text):
+        if token.kind == HEADING and token.level in (2, 3):
+            for img_list in figure_matcher().match(token.text):
+                figures.extend((find_image(img_path), caption) for img_path, caption in img_list)
+    return [(path, caption) for path, caption in figures if path]
+
+def section_key(section_text, salt):
+    """Content hash of a section's markdown and the figures (images and captions) it embeds."""
+    h = hashlib.sha256(salt)
+    h.update(section_text.encode('utf-8'))
+    for path, caption in section_images(section_text):
+        h.update(path.encode('utf-8'))
+        h.update(caption.encode('utf-8'))
+        with open(path, 'rb') as f:
+            h.update(hashlib.sha256(f.read()).digest())
+    return h.hexdigest()
+
+def render_section(section_text):
+    """Render one section into a standalone Fragment."""
+    doc = new_document()
+    render_tokens(doc, tokenize_markdown(section_text))
+    return capture_fragment(doc)
+
+def init_worker(images):
+    """Give a pool worker the parent's IMAGES (including --image-map anchors)."""
+    global _figure_matcher
+    images = dict(images)  # under fork this is the inherited IMAGES itself
+    IMAGES.clear()
+    IMAGES.update(images)
+    _figure_matcher = None
+
+def render_fragments(section_texts, jobs=1):
+    """Yield a Fragment per section, in order, rendering in `jobs` processes."""
+    if jobs <= 1 or len(section_texts) <= 1:
+        yield from map(render_section, section_texts)
+        return
+    with ProcessPoolExecutor(min(jobs, len(section_texts)), initializer=init_worker,
+                             initargs=(IMAGES,)) as pool:
+        yield from pool.map(render_section, section_texts)
+
+def render_parallel(doc, md_content, jobs, flush=None):
+    """Render '## ' sections in a process pool and stitch them in order.
+
+    The stitcher renumbers each fragment's relationship and drawing ids and
+    stores identical images once.
+    """
+    sections = split_sections(md_content)
+    stitcher = FragmentStitcher(doc)
+    for fragment in render_fragments(sections, jobs):
+        stitcher.append(fragment)
+        if flush:
+            flush()
+    print(f"Rendered {len(sections)} sections with {jobs} jobs")
+
+def render_incremental(doc, md_content, cache_dir=None, flush=None, jobs=1):
+    """Render the markdown section by section, reusing cached fragments.
+
+    Each '## ' section is keyed by its text, the bytes of its images and the
+    source of the converter and RENDER_MODULES, so only edited sections are
+    rendered again (in `jobs` processes).
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    h = hashlib.sha256()
+    for name in (os.path.basename(__file__), *RENDER_MODULES):
+        with open(os.path.join(script_dir, name), 'rb') as f:
+            h.update(f.read())
+    salt = h.digest()
+
+    sections = split_sections(md_content)
+    paths = [os.path.join(cache_dir, f"{section_key(text, salt)}.zip") for text in sections]
+    used = {os.path.basename(path) for path in paths}
+    stale = [text for text, path in zip(sections, paths) if not os.path.exists(path)]
+    fresh = render_fragments(stale, jobs)
+    rendered = len(stale)
+
+    stitcher = FragmentStitcher(doc)
+    for path in paths:
+        if os.path.exists(path):
+            fragment = load_fragment(path)
+        else:
+            fragment = next(fresh)
+            save_fragment(fragment, path)
+        stitcher.append(fragment)
+        if flush:
+            flush()
+
+    # Drop fragments of sections that no longer exist
+    for name in os.listdir(cache_dir):
+        if name.endswith('.zip') and name not in used:
+            os.remove(os.path.join(cache_dir, name))
+
+    print(f"Re-rendered {rendered} of {len(sections)} sections "
+          f"({len(sections) - rendered} from cache)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--image-map', metavar='FILE',
+                        help="JSON file of extra heading keyword -> [[image, caption], ...] anchors")
+    parser.add_argument('--incremental', action='store_true',
+                        help=f"re-render only changed sections, caching the rest in {CACHE_DIR}")
+    parser.add_argument('--stream', action='store_true',
+                        help="write the document to disk while rendering to keep memory flat")
+    parser.add_argument('--jobs', type=int, default=1, metavar='N',
+                        help="render '## ' sections in N worker processes (0: one per CPU)")
+    parser.add_argument('--zip-level', type=int, default=DEFAULT_XML_LEVEL,
+                        help=f"deflate level for XML parts; media is stored as is (default {DEFAULT_XML_LEVEL})")
+    args = parser.parse_args(argv)
+    jobs = args.jobs or os.cpu_count()
+
     print("Converting Technical Proposal to Word...")
 
     # Read markdown
     with open(MD_FILE, 'r', encoding='utf-8') as f:
         md_content = f.read()
 
-    # Create document
-    doc = Document()
+    if args.image_map:
+        load_image_map(args.image_map)
 
-    # Set default font
-    style = doc.styles['Normal']
-    style.font.name = 'Arial'
-    style.font.size = Pt(10)
+    # Resolve every image up front so problems show before the slow part
+    check_images()
+    load_cache()
+
+    # Create document
+    doc = new_document()
 
     # Add title first (extracted from markdown)
     title_para = doc.add_heading("Technical Proposal", level=0)
@@ -311,14 +711,40 @@ def main():
     # Page break after TOC
     doc.add_page_break()
 
-    # Process markdown
-    process_markdown(doc, md_content)
+    writer = StreamingDocxWriter(doc, OUTPUT_FILE, args.zip_level) if args.stream else None
+    flush = writer.flush if writer else None
+
+    # Process markdown: tokenize first so parse cost is measured on its own
+    start = time.perf_counter()
+    try:
+        if args.incremental:
+            render_incremental(doc, md_content, flush=flush, jobs=jobs)
+            print(f"Incremental render took {time.perf_counter() - start:.3f}s")
+        elif jobs > 1:
+            render_parallel(doc, md_content, jobs, flush)
+            print(f"Parallel render took {time.perf_counter() - start:.3f}s")
+        else:
+            tokens = list(tokenize_markdown(md_content))
+            parsed = time.perf_counter()
+            render_tokens(doc, tokens, flush)
+            rendered = time.perf_counter()
+            print(f"Parsed {len(tokens)} blocks in {parsed - start:.3f}s, "
+                  f"rendered in {rendered - parsed:.3f}s")
+    except BaseException:
+        # Leave the previous document in place
+        if writer:
+            writer.abort()
+        raise
 
     # Add DC/DR image after architecture section (if not already added)
     # This is a manual addition for the second architecture diagram
 
     # Save document
-    doc.save(OUTPUT_FILE)
+    if writer:
+        writer.close()
+    else:
+        save_docx(doc, OUTPUT_FILE, args.zip_level)
+    save_cache()
     print(f"Saved to: {OUTPUT_FILE}")
 
     # List images found
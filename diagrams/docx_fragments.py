@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Capture rendered Word body content as portable fragments and splice them back.
+
+A fragment is the body XML of a scratch document plus every relationship that
+XML points at (image blobs, external hyperlinks), so it can be cached on disk
+or sent between processes and appended to another document later.
+"""
+
+import hashlib
+import io
+import json
+import os
+import zipfile
+from collections import namedtuple
+
+from lxml import etree
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml.ns import qn
+
+R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+WP_DOCPR = qn('wp:docPr')
+
+# xml: serialized <w:body> wrapper around the content elements
+# rels: {rId: (reltype, target, blob)} - target is the URL for external
+#       relationships and the media filename (blob set) for images
+Fragment = namedtuple('Fragment', ['xml', 'rels'])
+
+def iter_rel_refs(element):
+    """Yield (element, attribute, rId) for every r:* reference under element."""
+    for el in element.iter():
+        for attr, value in el.attrib.items():
+            if attr.startswith('{%s}' % R_NS):
+                yield el, attr, value
+
+def capture_fragment(doc):
+    """Move the body of a scratch `doc` (minus section properties) into a Fragment."""
+    body = doc.element.body
+    wrapper = etree.Element(qn('w:body'), nsmap=doc.element.nsmap)
+    for child in list(body):
+        if child.tag != qn('w:sectPr'):
+            wrapper.append(child)
+
+    rels = {}
+    for _, _, rId in iter_rel_refs(wrapper):
+        if rId in rels:
+            continue
+        rel = doc.part.rels[rId]
+        if rel.is_external:
+            rels[rId] = (rel.reltype, rel.target_ref, None)
+        elif rel.reltype == RT.IMAGE:
+            part = rel.target_part
+            rels[rId] = (rel.reltype, os.path.basename(part.partname), part.blob)
+        else:
+            raise ValueError(f"Unsupported relationship in fragment: {rel.reltype}")
+
+    return Fragment(etree.tostring(wrapper), rels)
+
+class FragmentStitcher:
+    """Append many Fragments to one document, keeping state between them.
+
+    Relationship IDs are renumbered against the target part, identical images
+    (across all fragments) are stored once, and drawing ids continue from the
+    last one used instead of rescanning the body on every append.
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self._images = {}  # sha1 of blob -> rId in doc.part
+        body = doc.element.body
+        self._next_id = max((int(d.get('id')) for d in body.iter(WP_DOCPR)), default=0) + 1
+
+    def _image_rId(self, blob):
+        sha1 = hashlib.sha1(blob).hexdigest()
+        rId = self._images.get(sha1)
+        if rId is None:
+            rId, _ = self.doc.part.get_or_add_image(io.BytesIO(blob))
+            self._images[sha1] = rId
+        return rId
+
+    def append(self, fragment):
+        """Append a Fragment's content to the end of the document."""
+        wrapper = etree.fromstring(fragment.xml)
+        part = self.doc.part
+
+        new_ids = {}
+        for rId, (reltype, target, blob) in fragment.rels.items():
+            if blob is None:
+                new_ids[rId] = part.relate_to(target, reltype, is_external=True)
+            else:
+                new_ids[rId] = self._image_rId(blob)
+
+        for el, attr, rId in iter_rel_refs(wrapper):
+            el.set(attr, new_ids[rId])
+
+        for docPr in wrapper.iter(WP_DOCPR):
+            docPr.set('id', str(self._next_id))
+            if docPr.get('name', '').startswith('Picture '):
+                docPr.set('name', f"Picture {self._next_id}")
+            self._next_id += 1
+
+        body = self.doc.element.body
+        sectPr = body.find(qn('w:sectPr'))
+        for child in list(wrapper):
+            if sectPr is not None:
+                sectPr.addprevious(child)
+            else:
+                body.append(child)
+
+def save_fragment(fragment, path):
+    """Write a Fragment to a small zip archive at `path`."""
+    index = {}
+    tmp_path = path + '.tmp'
+    with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('fragment.xml', fragment.xml)
+        for rId, (reltype, target, blob) in fragment.rels.items():
+            if blob is not None:
+                target = f"{rId}-{target}"
+                zf.writestr(f"media/{target}", blob, compress_type=zipfile.ZIP_STORED)
+            index[rId] = {'type': reltype, 'target': target, 'external': blob is None}
+        zf.writestr('rels.json', json.dumps(index, indent=2))
+    os.replace(tmp_path, path)
+
+def load_fragment(path):
+    """Read a Fragment written by save_fragment()."""
+    with zipfile.ZipFile(path) as zf:
+        index = json.loads(zf.read('rels.json'))
+        rels = {}
+        for rId, rel in index.items():
+            blob = None if rel['external'] else zf.read(f"media/{rel['target']}")
+            rels[rId] = (rel['type'], rel['target'], blob)
+        return Fragment(zf.read('fragment.xml'), rels)
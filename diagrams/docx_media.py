@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""List the pictures of a .docx in document order, with their captions.
+
+iter_media() reads word/document.xml straight from the zip with iterparse in
+a single pass, clearing each body-level element once it has been handled, so
+memory stays flat however many figures the document holds:
+
+    for target, caption in iter_media('ISP-Portal-Screenshots.docx'):
+        print(target, caption)
+
+media_captions() does the same pairing for the paragraphs of a document
+that is already loaded.
+
+Run directly to print that list for one or more documents.
+"""
+
+import posixpath
+import sys
+import zipfile
+
+from lxml import etree
+from docx.opc.constants import RELATIONSHIP_TARGET_MODE as RTM
+from docx.oxml.ns import qn
+
+DOCUMENT_XML = 'word/document.xml'
+DOCUMENT_RELS = 'word/_rels/document.xml.rels'
+PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}Relationship'
+VML_IMAGEDATA = '{urn:schemas-microsoft-com:vml}imagedata'
+
+# Attributes that point a picture at its media: DrawingML blips and VML images
+IMAGE_REFS = {
+    qn('a:blip'): (qn('r:embed'), qn('r:link')),
+    VML_IMAGEDATA: (qn('r:id'),),
+}
+
+def read_targets(zf):
+    """Map each rId of the main document part to its zip member name (or URL)."""
+    targets = {}
+    for rel in etree.fromstring(zf.read(DOCUMENT_RELS)).iter(PKG_REL):
+        target = rel.get('Target')
+        if rel.get('TargetMode') != RTM.EXTERNAL:
+            target = posixpath.normpath(posixpath.join('word', target)).lstrip('/')
+        targets[rel.get('Id')] = target
+    return targets
+
+def paragraph_media(p):
+    """rIds of the pictures inside a paragraph, in order."""
+    rIds = []
+    for el in p.iter(*IMAGE_REFS):
+        rIds.extend(el.get(attr) for attr in IMAGE_REFS[el.tag] if el.get(attr))
+    return rIds
+
+def paragraph_text(p):
+    return ''.join(t.text or '' for t in p.iter(qn('w:t'))).strip()
+
+def media_captions(paragraphs):
+    """Yield (rId, caption) for every picture in a sequence of w:p elements.
+
+    `caption` is the text of the paragraph right after the picture's
+    paragraph ('' if that one is empty or holds pictures itself).
+    """
+    pending = []  # rIds from the previous paragraph awaiting a caption
+    for p in paragraphs:
+        rIds = paragraph_media(p)
+        caption = '' if rIds else paragraph_text(p)
+        for rId in pending:
+            yield rId, caption
+        pending = rIds
+    for rId in pending:
+        yield rId, ''
+
+def _iter_paragraphs(f):
+    """The w:p elements of a document.xml stream, each body block cleared once handled."""
+    for _, el in etree.iterparse(f, events=('end',), tag=(qn('w:p'), qn('w:tbl'))):
+        if el.tag == qn('w:p'):
+            yield el
+
+        parent = el.getparent()
+        if parent is not None and parent.tag == qn('w:body'):
+            # Done with this block - drop it and everything before it
+            el.clear()
+            while el.getprevious() is not None:
+                del parent[0]
+
+def iter_media(path):
+    """Yield (target, caption) for every picture in document order.
+
+    `target` is the media member name, e.g. 'word/media/image3.png', or the
+    URL of a linked picture; `caption` is as for media_captions().
+    """
+    with zipfile.ZipFile(path) as zf:
+        targets = read_targets(zf)
+        with zf.open(DOCUMENT_XML) as f:
+            for rId, caption in media_captions(_iter_paragraphs(f)):
+                yield targets[rId], caption
+
+def main():
+    for path in sys.argv[1:]:
+        print(path)
+        for i, (target, caption) in enumerate(iter_media(path), 1):
+            print(f"  {i:4d}  {target}  {caption}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Copy body content from one .docx into another at the XML level.
+
+Paragraphs, tables, drawings and captions are transplanted as they are,
+instead of being rebuilt through the python-docx API:
+
+    merger = DocxMerger(target_doc, Document('other.docx'), heading_offset=1)
+    merger.merge()                        # the whole body
+    merger.merge(elements_after_toc)      # or just some of its elements
+
+Relationships (images, hyperlinks) are re-created in the target, and images
+already stored there are reused. Styles the target lacks are copied with
+their basedOn/next/link chain, list numbering gets fresh w:num and
+w:abstractNum entries, and drawing and bookmark ids are kept unique.
+"""
+
+import re
+from copy import deepcopy
+
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml.ns import qn
+from docx.parts.image import ImagePart
+
+from docx_fragments import iter_rel_refs
+
+HEADING_STYLE_RE = re.compile(r'Heading(\d)$')
+STYLE_REF_TAGS = (qn('w:pStyle'), qn('w:rStyle'), qn('w:tblStyle'))
+STYLE_LINK_TAGS = (qn('w:basedOn'), qn('w:next'), qn('w:link'))
+
+def body_elements(doc):
+    """The block-level elements of a document body, without the section properties."""
+    return [child for child in doc.element.body if child.tag != qn('w:sectPr')]
+
+def prune_relationships(doc):
+    """Drop image and hyperlink relationships nothing in the document refers to.
+
+    Removing merged content leaves its relationships behind, and with them
+    the image parts, which would otherwise still be saved.
+    """
+    used = {rId for _, _, rId in iter_rel_refs(doc.element)}
+    rels = doc.part.rels
+    for rId in [rId for rId, rel in rels.items()
+                if rel.reltype in (RT.IMAGE, RT.HYPERLINK) and rId not in used]:
+        del rels[rId]
+
+class DocxMerger:
+    """Append body content of `source` to `target`, one merge() call at a time.
+
+    `heading_offset` demotes HeadingN paragraphs to Heading(N + offset) so a
+    whole document can sit under a heading of the target.
+    """
+
+    def __init__(self, target, source, heading_offset=0):
+        self.target = target
+        self.source = source
+        self.heading_offset = heading_offset
+        self._rIds = {}  # source rId -> target rId
+        self._num_ids = {}  # source numId -> target numId
+        self._images = {p.sha1: p for p in target.part.package.iter_parts()
+                        if isinstance(p, ImagePart)}
+
+        body = target.element.body
+        self._next_docPr = 1 + max((int(d.get('id')) for d in body.iter(qn('wp:docPr'))),
+                                   default=0)
+        self._next_bookmark = 1 + max((int(b.get(qn('w:id')))
+                                       for b in body.iter(qn('w:bookmarkStart'))), default=0)
+
+    def merge(self, elements=None):
+        """Append copies of `elements` (default: the whole source body) to the target.
+
+        Returns the number of elements appended.
+        """
+        if elements is None:
+            elements = body_elements(self.source)
+        copies = [deepcopy(el) for el in elements]
+
+        bookmarks = {}
+        for el in copies:
+            self._relink(el)
+            self._demote_headings(el)
+            for style_id in self._style_refs(el):
+                self._ensure_style(style_id)
+            self._renumber_lists(el)
+            for docPr in el.iter(qn('wp:docPr')):
+                docPr.set('id', str(self._next_docPr))
+                self._next_docPr += 1
+            for mark in el.iter(qn('w:bookmarkStart'), qn('w:bookmarkEnd')):
+                old = mark.get(qn('w:id'))
+                if old not in bookmarks:
+                    bookmarks[old] = str(self._next_bookmark)
+                    self._next_bookmark += 1
+                mark.set(qn('w:id'), bookmarks[old])
+
+        body = self.target.element.body
+        sectPr = body.find(qn('w:sectPr'))
+        for el in copies:
+            if sectPr is not None:
+                sectPr.addprevious(el)
+            else:
+                body.append(el)
+        return len(copies)
+
+    def _relink(self, element):
+        """Point every r:* reference at an equivalent relationship of the target."""
+        for el, attr, rId in iter_rel_refs(element):
+            if rId not in self._rIds:
+                self._rIds[rId] = self._copy_rel(self.source.part.rels[rId])
+            el.set(attr, self._rIds[rId])
+
+    def _copy_rel(self, rel):
+        part = self.target.part
+        if rel.is_external:
+            return part.relate_to(rel.target_ref, rel.reltype, is_external=True)
+        if rel.reltype != RT.IMAGE:
+            raise ValueError(f"Unsupported relationship in merged content: {rel.reltype}")
+
+        # Copied as a part rather than through get_or_add_image(), which only
+        # takes formats python-docx can parse (not EMF or SVG)
+        source = rel.target_part
+        image_part = self._images.get(source.sha1)
+        if image_part is None:
+            image_parts = part.package.image_parts
+            image_part = image_parts._get_by_sha1(source.sha1)
+            if image_part is None:
+                partname = image_parts._next_image_partname(source.partname.ext)
+                image_part = ImagePart(partname, source.content_type, source.blob)
+                image_parts.append(image_part)
+            self._images[source.sha1] = image_part
+        return part.relate_to(image_part, RT.IMAGE)
+
+    def _demote_headings(self, element):
+        if not self.heading_offset:
+            return
+        for pStyle in element.iter(qn('w:pStyle')):
+            m = HEADING_STYLE_RE.match(pStyle.get(qn('w:val')))
+            if m:
+                level = min(int(m.group(1)) + self.heading_offset, 9)
+                pStyle.set(qn('w:val'), f"Heading{level}")
+
+    @staticmethod
+    def _style_refs(element):
+        for el in element.iter(*STYLE_REF_TAGS):
+            yield el.get(qn('w:val'))
+
+    def _ensure_style(self, style_id):
+        """Copy a style (and the styles it builds on) from the source if the target lacks it."""
+        target_styles = self.target.styles.element
+        if target_styles.get_by_id(style_id) is not None:
+            return
+        style = self.source.styles.element.get_by_id(style_id)
+        if style is None:
+            return
+        style = deepcopy(style)
+        target_styles.append(style)
+        self._renumber_lists(style)
+        for link in style.iter(*STYLE_LINK_TAGS):
+            self._ensure_style(link.get(qn('w:val')))
+
+    def _renumber_lists(self, element):
+        """Give list paragraphs numbering definitions of their own in the target."""
+        for numId in element.iter(qn('w:numId')):
+            old = numId.get(qn('w:val'))
+            if old == '0':  # numbering explicitly turned off
+                continue
+            if old not in self._num_ids:
+                self._num_ids[old] = self._copy_num(old)
+            numId.set(qn('w:val'), self._num_ids[old])
+
+    def _copy_num(self, num_id):
+        source_numbering = self.source.part.numbering_part.element
+        numbering = self.target.part.numbering_part.element
+        num = deepcopy(source_numbering.num_having_numId(int(num_id)))
+
+        abstract_id = num.find(qn('w:abstractNumId')).get(qn('w:val'))
+        abstract = deepcopy(next(a for a in source_numbering.iter(qn('w:abstractNum'))
+                                 if a.get(qn('w:abstractNumId')) == abstract_id))
+        new_abstract_id = 1 + max((int(a.get(qn('w:abstractNumId')))
+                                   for a in numbering.iter(qn('w:abstractNum'))), default=-1)
+        abstract.set(qn('w:abstractNumId'), str(new_abstract_id))
+        # Word links lists that share an nsid, so let it assign a new one
+        for nsid in abstract.findall(qn('w:nsid')):
+            abstract.remove(nsid)
+
+        new_num_id = numbering._next_numId
+        num.set(qn('w:numId'), str(new_num_id))
+        num.find(qn('w:abstractNumId')).set(qn('w:val'), str(new_abstract_id))
+
+        # All w:abstractNum elements must come before the first w:num
+        first_num = numbering.find(qn('w:num'))
+        if first_num is not None:
+            first_num.addprevious(abstract)
+        else:
+            numbering.append(abstract)
+        numbering._insert_num(num)
+        return str(new_num_id)
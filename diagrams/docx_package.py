@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Save python-docx documents with a per-part compression policy.
+
+doc.save() deflates every part, including PNG/JPEG media that is already
+compressed, which costs CPU for almost no size gain on screenshot-heavy
+documents. save_docx() writes the same package but stores media parts with
+ZIP_STORED and deflates only the XML parts, at a configurable level.
+replace_media() swaps picture bytes in an already saved package without
+loading it into python-docx.
+
+Run directly to compare the two on existing documents:
+
+    python docx_package.py [--level N] FILE.docx ...
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import zipfile
+
+from lxml import etree
+from docx import Document
+from docx.opc.constants import CONTENT_TYPE as CT
+from docx.opc.packuri import PACKAGE_URI
+from docx.opc.pkgwriter import _ContentTypesItem
+from docx.oxml.ns import qn
+
+from docx_media import DOCUMENT_XML, read_targets
+
+DEFAULT_XML_LEVEL = 6  # zlib level for XML parts, same as doc.save()
+
+# Media that is already compressed - deflating it again gains nothing. Keyed by
+# content type because image partnames keep the source file's extension, if any.
+STORED_CONTENT_TYPES = {CT.PNG, CT.JPEG, CT.GIF}
+
+def write_member(zf, membername, blob, level=DEFAULT_XML_LEVEL, content_type=None):
+    """Write one package member to `zf` according to the compression policy."""
+    if content_type in STORED_CONTENT_TYPES:
+        zf.writestr(membername, blob, compress_type=zipfile.ZIP_STORED)
+    else:
+        zf.writestr(membername, blob, compress_type=zipfile.ZIP_DEFLATED, compresslevel=level)
+
+def save_docx(doc, path, level=DEFAULT_XML_LEVEL):
+    """Save `doc` to `path`, storing media and deflating XML at `level`.
+
+    The package is written to a temp file next to `path` and moved into place,
+    so an interrupted save never leaves a truncated document behind.
+    """
+    start = time.perf_counter()
+    package = doc.part.package
+    parts = list(package.iter_parts())
+    for part in parts:
+        part.before_marshal()
+
+    stored = 0
+    tmp_path = f"{path}.tmp"
+    with zipfile.ZipFile(tmp_path, 'w') as zf:
+        write_member(zf, '[Content_Types].xml', _ContentTypesItem.from_parts(parts).blob, level)
+        write_member(zf, PACKAGE_URI.rels_uri.membername, package.rels.xml, level)
+        for part in parts:
+            blob = part.blob
+            write_member(zf, part.partname.membername, blob, level, part.content_type)
+            if part.content_type in STORED_CONTENT_TYPES:
+                stored += len(blob)
+            if len(part.rels):
+                write_member(zf, part.partname.rels_uri.membername, part.rels.xml, level)
+    os.replace(tmp_path, path)
+
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {os.path.getsize(path) / 1e6:.2f} MB in {elapsed:.2f}s "
+          f"({stored / 1e6:.2f} MB of media stored uncompressed)")
+
+def replace_media(path, media, level=DEFAULT_XML_LEVEL):
+    """Replace media members of the saved package at `path` in place.
+
+    `media` maps member names ('word/media/image3.png') to (blob, (cx, cy));
+    every drawing of a replaced picture in the main document is resized to
+    the new extent. Other members are copied with their compression kept.
+    """
+    with zipfile.ZipFile(path) as src:
+        targets = read_targets(src)
+        document = etree.fromstring(src.read(DOCUMENT_XML))
+        for blip in document.iter(qn('a:blip')):
+            target = targets.get(blip.get(qn('r:embed')))
+            if target not in media:
+                continue
+            cx, cy = media[target][1]
+            inline = next(blip.iterancestors(qn('wp:inline'), qn('wp:anchor')))
+            ext = inline.find(f".//{qn('pic:spPr')}/{qn('a:xfrm')}/{qn('a:ext')}")
+            for el in (inline.find(qn('wp:extent')), ext):
+                if el is not None:
+                    el.set('cx', str(cx))
+                    el.set('cy', str(cy))
+        replaced = {name: blob for name, (blob, _) in media.items()}
+        replaced[DOCUMENT_XML] = etree.tostring(document, xml_declaration=True,
+                                                encoding='UTF-8', standalone=True)
+
+        tmp_path = f"{path}.tmp"
+        with zipfile.ZipFile(tmp_path, 'w') as dst:
+            for info in src.infolist():
+                blob = replaced.get(info.filename)
+                if blob is None:
+                    blob = src.read(info)
+                dst.writestr(info.filename, blob, compress_type=info.compress_type,
+                             compresslevel=level)
+    os.replace(tmp_path, path)
+
+def compare(path, level):
+    """Time doc.save() against save_docx() for one existing document."""
+    doc = Document(path)
+    with tempfile.TemporaryDirectory() as tmp:
+        default_path = os.path.join(tmp, 'default.docx')
+        start = time.perf_counter()
+        doc.save(default_path)
+        default_time = time.perf_counter() - start
+
+        policy_path = os.path.join(tmp, 'policy.docx')
+        start = time.perf_counter()
+        save_docx(doc, policy_path, level)
+        policy_time = time.perf_counter() - start
+
+        default_size = os.path.getsize(default_path)
+        policy_size = os.path.getsize(policy_path)
+
+    print(f"{os.path.basename(path)}: doc.save {default_time:.2f}s {default_size / 1e6:.2f} MB, "
+          f"save_docx {policy_time:.2f}s {policy_size / 1e6:.2f} MB "
+          f"(time {policy_time - default_time:+.2f}s, size {(policy_size - default_size) / 1e6:+.2f} MB)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('files', nargs='+', metavar='FILE.docx')
+    parser.add_argument('--level', type=int, default=DEFAULT_XML_LEVEL,
+                        help=f"deflate level for XML parts (default {DEFAULT_XML_LEVEL})")
+    args = parser.parse_args()
+    for path in args.files:
+        compare(path, args.level)
+
+if __name__ == '__main__':
+    main()
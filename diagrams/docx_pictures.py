@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Add many pictures to a python-docx Document at a flat cost per picture.
+
+run.add_picture() re-hashes every image part already in the package to find
+a duplicate, scans the relationships for a free rId and runs an xpath over
+the whole document for the next shape id, so a document of n pictures takes
+O(n^2) to build. PictureInserter keeps those three in a dict and counters:
+
+    pictures = PictureInserter(doc)
+    pictures.add_picture(doc.add_paragraph().add_run(), 'shot.png', width=Cm(16))
+"""
+
+from docx.image.image import Image
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.oxml.shape import CT_Inline
+from docx.parts.image import ImagePart
+from docx.shape import InlineShape
+
+class PictureInserter:
+    """Insert pictures into `doc`, reusing identical images."""
+
+    def __init__(self, doc):
+        self.part = doc.part
+        self._rIds = {}  # sha1 of image -> rId
+        for rId, rel in self.part.rels.items():
+            if rel.reltype == RT.IMAGE and not rel.is_external:
+                self._rIds.setdefault(rel.target_part.sha1, rId)
+        self._next_rId = 1 + max((int(rId[3:]) for rId in self.part.rels if rId[3:].isdigit()),
+                                 default=0)
+        self._next_image = 1 + max((p.partname.idx or 0 for p in self.part.package.image_parts),
+                                   default=0)
+        self._next_shape_id = self.part.next_id
+
+    def add_picture(self, run, image_descriptor, width=None, height=None):
+        """Append a picture to `run`, like Run.add_picture(); return its InlineShape."""
+        image = Image.from_file(image_descriptor)
+        rId = self._rIds.get(image.sha1)
+        if rId is None:
+            rId = self._add_image_part(image)
+        cx, cy = image.scaled_dimensions(width, height)
+        inline = CT_Inline.new_pic_inline(self._next_shape_id, rId, image.filename, cx, cy)
+        self._next_shape_id += 1
+        run._r.add_drawing(inline)
+        return InlineShape(inline)
+
+    def _add_image_part(self, image):
+        partname = PackURI(f"/word/media/image{self._next_image}.{image.ext}")
+        self._next_image += 1
+        image_part = ImagePart.from_image(image, partname)
+        # Registered so later python-docx adds see it for dedupe and naming
+        self.part.package.image_parts.append(image_part)
+
+        # Other code may have added relationships since, so skip ids now taken
+        while f"rId{self._next_rId}" in self.part.rels:
+            self._next_rId += 1
+        rId = f"rId{self._next_rId}"
+        self._next_rId += 1
+        self.part.rels.add_relationship(RT.IMAGE, image_part, rId)
+        self._rIds[image.sha1] = rId
+        return rId
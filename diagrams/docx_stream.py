@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Streaming .docx writer for very large generated documents.
+
+python-docx keeps the whole document.xml tree and every image blob in memory
+until save(). StreamingDocxWriter instead takes over a freshly created
+Document: content is still added through the normal python-docx API, but
+each flush() serializes the body built so far into a temp file with
+lxml.etree.xmlfile and drops it from the tree, and every picture is written
+into the zip the moment it is added. Peak memory stays at roughly one block
+of content plus one image, however long the document gets. The package is
+written next to the output and only moved into place by close(), so a
+build that fails (and abort()s) leaves the previous document as it was.
+
+    doc = Document()
+    with StreamingDocxWriter(doc, 'out.docx') as writer:
+        for item in items:
+            doc.add_paragraph(item)
+            writer.flush()
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+
+from lxml import etree
+from docx.image.image import Image
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PACKAGE_URI, PackURI
+from docx.opc.part import Part
+from docx.opc.pkgwriter import _ContentTypesItem
+from docx.oxml.ns import qn
+
+from docx_package import DEFAULT_XML_LEVEL, write_member
+
+MEDIA_NAME_RE = re.compile(r'/word/media/image(\d+)\.')
+
+class StreamingDocxWriter:
+    """Write a python-docx Document to `path` incrementally as it is built."""
+
+    def __init__(self, doc, path, level=DEFAULT_XML_LEVEL):
+        self.doc = doc
+        self.level = level
+        self.path = path
+        self._tmp_path = f"{path}.tmp"
+        self._part = doc.part
+        self._package = doc.part.package
+        self._images = {}  # sha1 -> rId
+        self._streamed = set()  # parts whose blob is already in the zip
+        self._next_image = 1 + max(
+            (int(m.group(1)) for p in self._package.iter_parts()
+             for m in [MEDIA_NAME_RE.match(p.partname)] if m),
+            default=0,
+        )
+        self._next_shape_id = 1
+
+        self._zip = zipfile.ZipFile(self._tmp_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=level)
+        self._body_file = tempfile.TemporaryFile()
+        self._contexts = []
+        self._xf = self._enter(etree.xmlfile(self._body_file, encoding='UTF-8'))
+        self._xf.write_declaration(standalone=True)
+        root = doc.element
+        self._enter(self._xf.element(root.tag, attrib=dict(root.attrib), nsmap=root.nsmap))
+        self._enter(self._xf.element(qn('w:body')))
+
+        # Route every picture python-docx adds through the zip
+        self._part.get_or_add_image = self._get_or_add_image
+
+    def _enter(self, context):
+        value = context.__enter__()
+        self._contexts.append(context)
+        return value
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _get_or_add_image(self, image_descriptor):
+        """Stand-in for StoryPart.get_or_add_image that streams the blob out."""
+        image = Image.from_file(image_descriptor)
+        rId = self._images.get(image.sha1)
+        if rId is None:
+            partname = PackURI(f"/word/media/image{self._next_image}.{image.ext}")
+            self._next_image += 1
+            write_member(self._zip, partname.membername, image.blob, self.level,
+                         image.content_type)
+
+            # An empty part keeps the relationship and content type in place
+            part = Part(partname, image.content_type, b'', self._package)
+            self._streamed.add(part)
+            rId = self._part.relate_to(part, RT.IMAGE)
+            self._images[image.sha1] = rId
+        return rId, image
+
+    def flush(self):
+        """Write the body content added since the last flush and drop it."""
+        body = self.doc.element.body
+        for child in list(body):
+            if child.tag == qn('w:sectPr'):
+                continue
+            body.remove(child)
+            etree.cleanup_namespaces(child)
+            for docPr in child.iter(qn('wp:docPr')):
+                docPr.set('id', str(self._next_shape_id))
+                self._next_shape_id += 1
+            self._xf.write(child)
+
+    def close(self):
+        """Finish document.xml and write the remaining package parts."""
+        self.flush()
+        sectPr = self.doc.element.body.find(qn('w:sectPr'))
+        if sectPr is not None:
+            self._xf.write(sectPr)
+        while self._contexts:
+            self._contexts.pop().__exit__(None, None, None)
+
+        zf = self._zip
+        self._body_file.seek(0)
+        with zf.open(self._part.partname.membername, 'w') as f:
+            shutil.copyfileobj(self._body_file, f)
+        self._body_file.close()
+
+        parts = list(self._package.iter_parts())
+        for part in parts:
+            if part is not self._part and part not in self._streamed:
+                write_member(zf, part.partname.membername, part.blob, self.level,
+                             part.content_type)
+            if len(part.rels):
+                write_member(zf, part.partname.rels_uri.membername, part.rels.xml, self.level)
+        write_member(zf, PACKAGE_URI.rels_uri.membername, self._package.rels.xml, self.level)
+        write_member(zf, '[Content_Types].xml', _ContentTypesItem.from_parts(parts).blob, self.level)
+        zf.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Discard the partially written package, keeping whatever was at `path`."""
+        self._body_file.close()
+        self._zip.close()
+        os.remove(self._tmp_path)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Read image dimensions from file headers, without decoding pixels.
+
+Placing a picture only needs its width and height: a PNG has them in the
+IHDR chunk at a fixed offset, a JPEG in its first SOF segment and a GIF in
+the logical screen descriptor. image_size() reads just those bytes and
+remembers the answer per (path, mtime, size) in a JSON file under the build
+cache, so repeated builds do not open unchanged files at all:
+
+    load_cache()
+    width, height = image_size('screenshots/dashboard.png')
+    save_cache()
+
+Run directly to print the sizes of some files.
+"""
+
+import json
+import os
+import struct
+import sys
+
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.image-cache', 'sizes.json')
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# Start-of-frame markers; C4 (DHT), C8 (JPG) and CC (DAC) share the range but aren't frames
+JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Markers without a length field
+JPEG_STANDALONE = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8, 0xD9}
+
+_cache = {}  # path -> [mtime_ns, size, width, height]
+
+def _jpeg_size(f):
+    """Walk the JPEG segments after SOI up to the first frame header."""
+    while True:
+        byte = f.read(1)
+        if not byte:
+            return None
+        if byte != b'\xff':
+            continue  # not at a marker; resync
+        marker = f.read(1)
+        while marker == b'\xff':  # fill bytes
+            marker = f.read(1)
+        if not marker:
+            return None
+        code = marker[0]
+        if code in JPEG_STANDALONE:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        if code in JPEG_SOF:
+            header = f.read(5)
+            if len(header) < 5:
+                return None
+            height, width = struct.unpack('>xHH', header)
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+def read_size(path):
+    """(width, height) in pixels from the header of a PNG, JPEG or GIF file, or None."""
+    with open(path, 'rb') as f:
+        head = f.read(26)
+        if head.startswith(PNG_SIGNATURE) and head[12:16] == b'IHDR':
+            return struct.unpack('>II', head[16:24])
+        if head[:6] in (b'GIF87a', b'GIF89a'):
+            return struct.unpack('<HH', head[6:10])
+        if head.startswith(b'\xff\xd8'):
+            f.seek(2)
+            return _jpeg_size(f)
+    return None
+
+def image_size(path):
+    """Cached read_size(): reused while the file's mtime and length are unchanged."""
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    entry = _cache.get(path)
+    if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+        return entry[2], entry[3]
+    size = read_size(path)
+    if size is not None:
+        _cache[path] = [st.st_mtime_ns, st.st_size, *size]
+    return size
+
+def fit_size(size, max_width, max_height):
+    """Keyword arguments for add_picture() that fit an image of `size` in the box.
+
+    Images are shown `max_width` wide unless that would make them taller
+    than `max_height`, in which case the height is capped instead. Lengths
+    are python-docx Length values; an unknown `size` gets the full width.
+    """
+    if size is None:
+        return {'width': max_width}
+    width, height = size
+    if max_width * height / width > max_height:
+        return {'height': max_height}
+    return {'width': max_width}
+
+def load_cache(path=None):
+    path = path or CACHE_FILE
+    try:
+        with open(path) as f:
+            _cache.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+
+def save_cache(path=None):
+    """Write the cache, dropping entries for files that no longer exist."""
+    path = path or CACHE_FILE
+    for image_path in [p for p in _cache if not os.path.exists(p)]:
+        del _cache[image_path]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(_cache, f)
+    os.replace(tmp_path, path)
+
+def main():
+    for path in sys.argv[1:]:
+        size = read_size(path)
+        print(f"{path}: {'%dx%d' % size if size else 'unknown format'}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Downscale and recompress screenshots before they are embedded in Word.
+
+Playwright captures 1920px-wide PNGs, but a figure 16cm wide only needs
+about 945px at 150 DPI. prepare_images() resizes each image to the printed
+width at a given DPI, drops metadata (text chunks, EXIF, ICC profiles) and
+recompresses it, in a process pool. Results are cached on disk keyed by the
+source bytes, the target pixel width and PREP_VERSION, so unchanged
+screenshots cost one hash on the next build.
+"""
+
+import hashlib
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+DEFAULT_DPI = 150
+PREP_VERSION = 2  # bump when prepare_blob() output changes
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+JPEG_SIGNATURE = b'\xff\xd8'
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.image-cache')
+
+def target_pixels(width_inches, dpi=DEFAULT_DPI):
+    """Pixel width needed to print `width_inches` at `dpi`."""
+    return max(1, round(width_inches * dpi))
+
+def prepare_blob(blob, max_px):
+    """Return the image in `blob` no wider than `max_px`, without metadata.
+
+    PNGs stay PNG (optimized) and JPEGs stay JPEG. Other formats (GIF,
+    EMF, SVG, ...) and results that are not smaller than the input are
+    returned unchanged.
+    """
+    if not blob.startswith((PNG_SIGNATURE, JPEG_SIGNATURE)):
+        return blob
+    with Image.open(io.BytesIO(blob)) as im:
+        fmt = im.format
+        if im.width > max_px:
+            height = max(1, round(im.height * max_px / im.width))
+            im = im.resize((max_px, height), Image.LANCZOS)
+        out = io.BytesIO()
+        if fmt == 'JPEG':
+            im.convert('RGB').save(out, 'JPEG', quality=85, optimize=True, progressive=True,
+                                   icc_profile=None)
+        else:
+            im.save(out, 'PNG', optimize=True, icc_profile=None)
+    prepared = out.getvalue()
+    return prepared if len(prepared) < len(blob) else blob
+
+def cache_key(blob, max_px):
+    h = hashlib.sha256(blob)
+    h.update(f"{max_px}:{PREP_VERSION}".encode())
+    return h.hexdigest()
+
+def _prepare_to(source, max_px, path):
+    """Pool worker: prepare `source` (a file path or bytes) into `path`."""
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            source = f.read()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(prepare_blob(source, max_px))
+    os.replace(tmp_path, path)
+
+def _prepare_all(sources, blobs, max_px, jobs, cache_dir):
+    """Prepare `sources` (paths or bytes) whose contents are `blobs`; return cache paths."""
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    start = time.perf_counter()
+
+    # Keep the source extension: python-docx names media parts after the file
+    paths = [os.path.join(cache_dir, cache_key(blob, max_px) +
+                          (os.path.splitext(source)[1] if isinstance(source, str) else ''))
+             for source, blob in zip(sources, blobs)]
+    todo = {}
+    for source, path in zip(sources, paths):
+        if not os.path.exists(path):
+            todo.setdefault(path, source)
+
+    if jobs == 1 or len(todo) <= 1:
+        for path, source in todo.items():
+            _prepare_to(source, max_px, path)
+    else:
+        with ProcessPoolExecutor(jobs) as pool:
+            list(pool.map(_prepare_to, todo.values(), [max_px] * len(todo), todo.keys()))
+
+    before = sum(len(blob) for blob in blobs)
+    after = sum(os.path.getsize(path) for path in paths)
+    print(f"Prepared {len(paths)} images at {max_px}px ({len(todo)} processed, "
+          f"{len(paths) - len(todo)} cached): {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB "
+          f"in {time.perf_counter() - start:.2f}s")
+    return paths
+
+def prepare_images(image_paths, width_inches, dpi=DEFAULT_DPI, jobs=None, cache_dir=None):
+    """Prepare image files for printing `width_inches` wide; return {source: prepared path}."""
+    image_paths = [str(p) for p in image_paths]
+    blobs = []
+    for path in image_paths:
+        with open(path, 'rb') as f:
+            blobs.append(f.read())
+    prepared = _prepare_all(image_paths, blobs, target_pixels(width_inches, dpi), jobs, cache_dir)
+    return dict(zip(image_paths, prepared))
+
+def prepare_blobs(blobs, width_inches, dpi=DEFAULT_DPI, jobs=None, cache_dir=None):
+    """Like prepare_images() for in-memory images; returns the prepared bytes in order."""
+    prepared = _prepare_all(blobs, blobs, target_pixels(width_inches, dpi), jobs, cache_dir)
+    result = []
+    for path in prepared:
+        with open(path, 'rb') as f:
+            result.append(f.read())
+    return result
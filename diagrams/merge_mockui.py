@@ -1,21 +1,137 @@
 #!/usr/bin/env python3
 """Merge ISP Portal Screenshots into Technical Proposal as Mock UI section."""
 
-from docx import Document
-from docx.shared import Inches, Pt
-from docx.enum.text import WD_ALIGN_PARAGRAPH
+import hashlib
 import os
+import zipfile
+
+from lxml import etree
+from docx import Document
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.parts.image import ImagePart
+from docx.shared import Cm
+
+from docx_media import DOCUMENT_XML, media_captions
+from docx_merge import DocxMerger, body_elements, prune_relationships
+from docx_package import save_docx
+from image_prep import DEFAULT_DPI, prepare_blobs
 
 BASE_DIR = "/home/mustafa/Dropbox/Telcobright Customers Work/BTRC/BroadbandPeformanceMonitoringEOI"
 TECH_PROPOSAL = f"{BASE_DIR}/diagrams/Technical-Proposal.docx"
 ISP_SCREENSHOTS = f"{BASE_DIR}/isp-mon/ISP-Portal-Screenshots.docx"
 OUTPUT_FILE = f"{BASE_DIR}/diagrams/Technical-Proposal.docx"
 
+# Width the screenshots are shown at (create-word-doc.py's A4_WIDTH)
+FIGURE_WIDTH = Cm(16)
+
+# Leading underscore keeps the bookmark hidden in Word
+APPENDIX_BOOKMARK = '_AppendixA_'
+
+def screenshot_elements(screenshots_doc):
+    """Body elements of the screenshots document after its title page and TOC."""
+    elements = body_elements(screenshots_doc)
+    for i, el in enumerate(elements):
+        for br in el.iter(qn('w:br')):
+            if br.get(qn('w:type')) == 'page':
+                return elements[i + 1:]
+    return elements
+
+def file_digest(path):
+    """Short content hash of a file, used to tag the appendix built from it."""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+def appendix_bookmark(path):
+    """Name of the appendix bookmark in a .docx, or None.
+
+    Reads word/document.xml straight from the zip, without loading the
+    package and its media the way Document() does.
+    """
+    with zipfile.ZipFile(path) as zf, zf.open(DOCUMENT_XML) as f:
+        for _, el in etree.iterparse(f, events=('start',), tag=qn('w:bookmarkStart')):
+            name = el.get(qn('w:name'), '')
+            if name.startswith(APPENDIX_BOOKMARK):
+                return name
+    return None
+
+def top_level(body, el):
+    """The direct child of `body` that contains `el`."""
+    while el.getparent() is not body:
+        el = el.getparent()
+    return el
+
+def find_appendix(doc):
+    """Return (bookmark name, elements) of the appendix a previous run inserted.
+
+    The appendix is wrapped in a hidden bookmark named APPENDIX_BOOKMARK plus
+    the source hash; (None, []) if the document has none.
+    """
+    body = doc.element.body
+    for start in body.iter(qn('w:bookmarkStart')):
+        name = start.get(qn('w:name'), '')
+        if not name.startswith(APPENDIX_BOOKMARK):
+            continue
+        bookmark_id = start.get(qn('w:id'))
+        end = next((e for e in body.iter(qn('w:bookmarkEnd'))
+                    if e.get(qn('w:id')) == bookmark_id), None)
+        children = [el for el in body if el.tag != qn('w:sectPr')]
+        first = children.index(top_level(body, start))
+        last = children.index(top_level(body, end)) if end is not None else len(children) - 1
+        return name, children[first:last + 1]
+    return None, []
+
+def mark_appendix(doc, elements, name):
+    """Wrap the appendix elements in a hidden bookmark called `name`.
+
+    Returns the elements with the closing w:bookmarkEnd appended.
+    """
+    body = doc.element.body
+    bookmark_id = str(1 + max((int(b.get(qn('w:id'))) for b in body.iter(qn('w:bookmarkStart'))),
+                              default=0))
+    start = OxmlElement('w:bookmarkStart')
+    start.set(qn('w:id'), bookmark_id)
+    start.set(qn('w:name'), name)
+    elements[0].insert(0, start)
+    end = OxmlElement('w:bookmarkEnd')
+    end.set(qn('w:id'), bookmark_id)
+    elements[-1].addnext(end)
+    return elements + [end]
+
+def downscale_images(screenshots_doc):
+    """Shrink the source's PNG and JPEG media to FIGURE_WIDTH at DEFAULT_DPI before it is copied.
+
+    Other image parts (EMF, SVG, GIF) are copied as they are.
+    """
+    parts = [p for p in screenshots_doc.part.package.iter_parts()
+             if isinstance(p, ImagePart) and p.content_type in ('image/png', 'image/jpeg')]
+    blobs = prepare_blobs([p.blob for p in parts], FIGURE_WIDTH.inches, DEFAULT_DPI)
+    for part, blob in zip(parts, blobs):
+        part._blob = blob
+
 def main():
     print("Merging ISP Portal Screenshots into Technical Proposal...")
 
+    # An appendix from an earlier run is replaced in place - or kept as it is
+    # if the screenshots document has not changed since
+    bookmark = APPENDIX_BOOKMARK + file_digest(ISP_SCREENSHOTS)
+    if OUTPUT_FILE == TECH_PROPOSAL and appendix_bookmark(TECH_PROPOSAL) == bookmark:
+        print("Appendix A is up to date with ISP Portal Screenshots; nothing to do")
+        return
+
     # Open the technical proposal
     doc = Document(TECH_PROPOSAL)
+    body = doc.element.body
+
+    _, old_elements = find_appendix(doc)
+    anchor = None
+    if old_elements:
+        print("Replacing the existing Appendix A")
+        anchor = old_elements[-1].getnext()
+        for el in old_elements:
+            body.remove(el)
+        prune_relationships(doc)
+    existing = set(body)
 
     # Add a page break before the new section
     doc.add_page_break()
@@ -29,67 +145,32 @@ def main():
 
     doc.add_paragraph()
 
-    # Open the screenshots document to extract images
+    # Transplant the screenshot pages - headings, figures and their captions -
+    # as XML, demoting their headings to sit under the appendix heading
     screenshots_doc = Document(ISP_SCREENSHOTS)
-
-    # Extract and add each image
-    img_count = 0
-    for rel in screenshots_doc.part.rels.values():
-        if "image" in rel.target_ref:
-            img_count += 1
-
-    print(f"Found {img_count} images in ISP Portal Screenshots")
-
-    # Extract images to temp folder
-    import zipfile
-    import shutil
-
-    temp_dir = "/tmp/isp-portal-images"
-    if os.path.exists(temp_dir):
-        shutil.rmtree(temp_dir)
-    os.makedirs(temp_dir)
-
-    with zipfile.ZipFile(ISP_SCREENSHOTS, 'r') as zip_ref:
-        for file in zip_ref.namelist():
-            if file.startswith('word/media/'):
-                zip_ref.extract(file, temp_dir)
-
-    # Get list of extracted images sorted by number
-    media_dir = os.path.join(temp_dir, 'word', 'media')
-    images = sorted(os.listdir(media_dir), key=lambda x: int(x.replace('image', '').replace('.png', '').replace('.jpeg', '').replace('.jpg', '')))
-
-    print(f"Adding {len(images)} images to Technical Proposal...")
-
-    # Add images with captions
-    for i, img_file in enumerate(images, 1):
-        img_path = os.path.join(media_dir, img_file)
-
-        # Add image
-        para = doc.add_paragraph()
-        para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        run = para.add_run()
-        run.add_picture(img_path, width=Inches(5.5))
-
-        # Add caption
-        caption = doc.add_paragraph()
-        caption.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        cap_run = caption.add_run(f"Screenshot {i}: ISP Portal Interface")
-        cap_run.font.size = Pt(9)
-        cap_run.font.italic = True
-
-        # Add spacing
-        doc.add_paragraph()
-
-        if i % 10 == 0:
-            print(f"  Added {i} images...")
-
-    # Clean up
-    shutil.rmtree(temp_dir)
+    elements = screenshot_elements(screenshots_doc)
+    rels = screenshots_doc.part.rels
+    paragraphs = (p for el in elements for p in el.iter(qn('w:p')))
+    figures = [(rels[rId].target_ref, caption) for rId, caption in media_captions(paragraphs)]
+    print(f"Found {len(figures)} figures in ISP Portal Screenshots")
+    for target, caption in figures:
+        print(f"  {os.path.basename(target)}: {caption or '(no caption)'}")
+
+    downscale_images(screenshots_doc)
+    merger = DocxMerger(doc, screenshots_doc, heading_offset=1)
+    merger.merge(elements)
+
+    appendix = [el for el in body if el not in existing and el.tag != qn('w:sectPr')]
+    appendix = mark_appendix(doc, appendix, bookmark)
+    if anchor is not None and anchor.tag != qn('w:sectPr'):
+        # Move it back to where the old appendix was
+        for el in appendix:
+            anchor.addprevious(el)
 
     # Save
-    doc.save(OUTPUT_FILE)
+    save_docx(doc, OUTPUT_FILE)
     print(f"Saved to: {OUTPUT_FILE}")
-    print(f"Total images added: {len(images)}")
+    print(f"Total images added: {len(figures)}")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark create-word-doc.py against synthetic manifests of growing size.
+Per-figure time should stay flat if the build is linear in the entry count.
+
+Screenshots are embedded as they are (no downscaling or stitching), and the
+build caches are kept in the temporary directory, so every run starts cold
+and leaves the real caches alone.
+
+Usage: python bench-word-doc.py [--stream] [SIZES ...]   (default: 50 500 5000)
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+DEFAULT_SIZES = [50, 500, 5000]
+FIGURES_PER_SECTION = 5
+
+spec = importlib.util.spec_from_file_location('create_word_doc', SCRIPT_DIR / 'create-word-doc.py')
+create_word_doc = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(create_word_doc)
+
+# create-word-doc.py puts diagrams/ on sys.path
+import image_meta
+from bench_proposal import make_png
+
+def write_manifest(screenshot_dir, entries):
+    """Write `entries` distinct PNGs and a manifest.json describing them."""
+    screenshots = []
+    for i in range(entries):
+        filename = f"shot-{i:05d}.png"
+        with open(screenshot_dir / filename, 'wb') as f:
+            f.write(make_png(64, 40, i))
+        section = i // FIGURES_PER_SECTION
+        screenshots.append({'filename': filename, 'title': f"Module {section} - View {i}"})
+    with open(screenshot_dir / 'manifest.json', 'w') as f:
+        json.dump({'screenshots': screenshots}, f)
+
+def time_build(entries, stream):
+    with tempfile.TemporaryDirectory() as tmp:
+        screenshot_dir = Path(tmp)
+        write_manifest(screenshot_dir, entries)
+        create_word_doc.SCREENSHOT_DIR = screenshot_dir
+        create_word_doc.OUTPUT_FILE = screenshot_dir / 'out.docx'
+        create_word_doc.STITCHED_DIR = screenshot_dir / 'stitched'
+        create_word_doc.DEDUP_CACHE = screenshot_dir / 'dhash.json'
+        image_meta.CACHE_FILE = str(screenshot_dir / 'sizes.json')
+
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            create_word_doc.create_document(stream=stream, dpi=0, stitch=False)
+            return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark create-word-doc.py build time.")
+    parser.add_argument('sizes', nargs='*', type=int, default=DEFAULT_SIZES)
+    parser.add_argument('--stream', action='store_true', help="build with --stream")
+    args = parser.parse_args()
+
+    print(f"{'entries':>8}  {'total':>9}  {'per figure':>11}")
+    per_figure = []
+    for entries in args.sizes:
+        elapsed = time_build(entries, args.stream)
+        per_figure.append(elapsed / entries)
+        print(f"{entries:>8}  {elapsed:>8.2f}s  {per_figure[-1] * 1000:>9.2f}ms")
+    if len(per_figure) > 1:
+        print(f"\nPer-figure cost, largest vs smallest run: {per_figure[-1] / per_figure[0]:.2f}x "
+              f"(1.0x is linear)")
+
+if __name__ == '__main__':
+    main()
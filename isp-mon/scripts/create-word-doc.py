@@ -2,28 +2,206 @@
 """
 Generate a Word document with screenshots and captions.
 Scales images to fit A4 page width.
+
+With --dedup, screenshots that repeat an earlier one (a page and its
+default tab) are embedded once and referred to by figure number.
+
+Each build writes a record of its inputs next to the document. With
+--incremental, a run whose manifest, images and options match that record
+does nothing, and a run where only image contents changed swaps those
+images inside the existing document instead of rebuilding it.
 """
 
+import argparse
+import hashlib
 import json
-import os
+import sys
+from collections import Counter
 from pathlib import Path
 from docx import Document
-from docx.shared import Inches, Pt, Cm
+from docx.image.image import Image as DocxImage
+from docx.shared import Pt, Cm
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
 
 # Paths
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_DIR = SCRIPT_DIR.parent
 SCREENSHOT_DIR = PROJECT_DIR / 'screenshots'
+STITCHED_DIR = SCREENSHOT_DIR / 'stitched'
 OUTPUT_FILE = PROJECT_DIR / 'ISP-Portal-Screenshots.docx'
+RECORD_VERSION = 2  # bump when the document layout or the record format changes
+
+# Shared .docx helpers live next to the proposal converter
+sys.path.insert(0, str(PROJECT_DIR.parent / 'diagrams'))
+from docx_media import iter_media
+from docx_package import DEFAULT_XML_LEVEL, replace_media, save_docx
+from docx_pictures import PictureInserter
+from image_meta import fit_size, image_size, load_cache, save_cache
+from image_prep import CACHE_DIR, DEFAULT_DPI, prepare_images
+from docx_stream import StreamingDocxWriter
+from screenshot_dedup import DEFAULT_MAX_DISTANCE, mark_duplicates
+from screenshot_stitch import stitch_screenshots
+
+DEDUP_CACHE = Path(CACHE_DIR) / 'dhash.json'
 
 # A4 page dimensions (with margins)
 # A4 is 21cm x 29.7cm, with 2.54cm margins on each side = ~16cm usable width
 A4_WIDTH = Cm(16)
-
-def create_document():
-    """Create the Word document with screenshots."""
+# 29.7cm less margins, leaving room for a heading and the caption
+A4_FIGURE_HEIGHT = Cm(22)
+
+def append_paragraph(doc):
+    """doc.add_paragraph() without its search of the whole body for w:sectPr."""
+    body = doc.element.body
+    p = OxmlElement('w:p')
+    last = next(body.iterchildren(reversed=True), None)  # len(body) would count them all
+    if last is not None and last.tag == qn('w:sectPr'):
+        last.addprevious(p)
+    else:
+        body.append(p)
+    return Paragraph(p, doc._body)
+
+def add_figure(doc, image_path, caption, width=A4_WIDTH, height=None, pictures=None):
+    """Add a centered picture, its caption and a spacer; return the picture paragraph.
+
+    Works only on the paragraphs it creates, so the cost per figure does not
+    grow with the document (doc.paragraphs rebuilds the whole list on each
+    access). Pass a PictureInserter as `pictures` to avoid python-docx's
+    per-picture scans of the package as well.
+    """
+    picture = append_paragraph(doc)
+    picture.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    run = picture.add_run()
+    if pictures:
+        pictures.add_picture(run, str(image_path), width=width, height=height)
+    else:
+        run.add_picture(str(image_path), width=width, height=height)
+
+    caption_para = append_paragraph(doc)
+    caption_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    caption_run = caption_para.add_run(caption)
+    caption_run.font.size = Pt(10)
+    caption_run.font.italic = True
+
+    append_paragraph(doc)  # Add spacing
+    return picture
+
+def add_reference(doc, text):
+    """Add a caption-style line standing in for a figure shown elsewhere."""
+    para = append_paragraph(doc)
+    para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    run = para.add_run(text)
+    run.font.size = Pt(10)
+    run.font.italic = True
+
+    append_paragraph(doc)  # Add spacing
+
+def describe_figures(screenshots):
+    """Manifest entries with sha256, width and height filled in from the files.
+
+    take-screenshots.js records these itself; they are computed here for
+    entries without them (older manifests, stitched pages), the size from
+    the image header only. Missing files get a sha256 of None.
+    """
+    figures = []
+    for item in screenshots:
+        figure = dict(item)
+        image_path = SCREENSHOT_DIR / item['filename']
+        if image_path.exists():
+            if 'sha256' not in figure:
+                with open(image_path, 'rb') as f:
+                    figure['sha256'] = hashlib.sha256(f.read()).hexdigest()
+            size = image_size(image_path) if 'width' not in figure else None
+            if size:
+                figure['width'], figure['height'] = size
+        figure.setdefault('sha256', None)
+        figures.append(figure)
+    return figures
+
+def figure_fit(figure):
+    """add_picture() size for a figure: A4_WIDTH wide, or A4_FIGURE_HEIGHT tall if that's less."""
+    size = (figure['width'], figure['height']) if figure.get('width') else None
+    return fit_size(size, A4_WIDTH, A4_FIGURE_HEIGHT)
+
+def record_path():
+    return OUTPUT_FILE.with_suffix('.build.json')
+
+def load_record():
+    try:
+        with open(record_path()) as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return record if record.get('version') == RECORD_VERSION else None
+
+def output_digest():
+    """Size and sha256 of OUTPUT_FILE, to tell whether it is still the recorded build."""
+    with open(OUTPUT_FILE, 'rb') as f:
+        blob = f.read()
+    return {'size': len(blob), 'sha256': hashlib.sha256(blob).hexdigest()}
+
+def save_record(options, figures):
+    """Record what went into OUTPUT_FILE; each figure names its media member."""
+    with open(record_path(), 'w') as f:
+        json.dump({'version': RECORD_VERSION, 'options': options, 'output': output_digest(),
+                   'figures': figures}, f, indent=2)
+
+def figure_layout(figures):
+    return [(f['filename'], f['title'], f['sha256'] is None, f.get('duplicate_of'))
+            for f in figures]
+
+def update_in_place(previous, figures, dpi, jobs, zip_level):
+    """Re-embed the figures whose image changed since `previous` in OUTPUT_FILE.
+
+    Returns how many were re-embedded, or None without touching the document
+    if more than image contents changed (entries added, removed or retitled)
+    or a changed image shares its media part with another figure.
+    """
+    old_figures = previous['figures']
+    if figure_layout(old_figures) != figure_layout(figures):
+        return None
+    uses = Counter(f['media'] for f in old_figures)
+    changed = []
+    for old, figure in zip(old_figures, figures):
+        # A duplicate still repeating the same figure changes nothing in the document
+        if old['sha256'] != figure['sha256'] and not figure.get('duplicate_of'):
+            if old['media'] is None or uses[old['media']] > 1:
+                return None
+            changed.append((old['media'], figure))
+
+    image_paths = [SCREENSHOT_DIR / figure['filename'] for _, figure in changed]
+    prepared = prepare_images(image_paths, A4_WIDTH.inches, dpi, jobs) if dpi and changed else {}
+    media = {}
+    for (member, figure), image_path in zip(changed, image_paths):
+        with open(prepared.get(str(image_path), image_path), 'rb') as f:
+            blob = f.read()
+        image = DocxImage.from_blob(blob)
+        if not member.endswith(f".{image.ext}"):
+            return None  # different format, so a different content type
+        media[member] = (blob, image.scaled_dimensions(**figure_fit(figure)))
+    if media:
+        replace_media(OUTPUT_FILE, media, zip_level)
+    for old, figure in zip(old_figures, figures):
+        figure['media'] = old['media']
+    for _, figure in changed:
+        print(f"Re-embedded: {figure['title']}")
+    return len(changed)
+
+def create_document(stream=False, zip_level=DEFAULT_XML_LEVEL, dpi=DEFAULT_DPI, jobs=None,
+                    stitch=True, incremental=False, dedup=None):
+    """Create the Word document with screenshots.
+
+    With `stream`, the document is written to disk figure by figure instead
+    of being held in memory until the end. With `stitch`, the _partN shots
+    of a long page are joined and re-cut at page height. Screenshots are
+    downscaled to A4_WIDTH at `dpi` first (in `jobs` processes); a `dpi` of
+    0 embeds the originals. With `incremental`, the previous build is reused
+    where the build record allows. A `dedup` distance embeds screenshots
+    within that many perceptual-hash bits of an earlier one only once.
+    """
 
     # Load manifest
     manifest_path = SCREENSHOT_DIR / 'manifest.json'
@@ -41,6 +219,33 @@ def create_document():
         print("No screenshots found in manifest.")
         return
 
+    if stitch:
+        screenshots = stitch_screenshots(screenshots, SCREENSHOT_DIR, STITCHED_DIR,
+                                         A4_FIGURE_HEIGHT / A4_WIDTH)
+
+    load_cache()
+    figures = describe_figures(screenshots)
+    save_cache()
+    if dedup is not None:
+        duplicates = mark_duplicates(figures, SCREENSHOT_DIR, dedup, DEDUP_CACHE)
+        print(f"Found {duplicates} duplicate screenshot(s)")
+    options = {'dpi': dpi, 'stitch': stitch, 'zip_level': zip_level, 'dedup': dedup}
+    previous = load_record() if incremental and OUTPUT_FILE.exists() else None
+    if previous and previous['output'] != output_digest():
+        # Replaced, edited or left broken by a failed build since it was recorded
+        print(f"{OUTPUT_FILE} does not match its build record; rebuilding the whole document")
+        previous = None
+    if previous and previous['options'] == options:
+        updated = update_in_place(previous, figures, dpi, jobs, zip_level)
+        if updated == 0:
+            print(f"✓ Up to date: {OUTPUT_FILE}")
+            return
+        if updated:
+            save_record(options, figures)
+            print(f"\n✓ Re-embedded {updated} figure(s) in: {OUTPUT_FILE}")
+            return
+        print("Manifest layout changed; rebuilding the whole document")
+
     # Create document
     doc = Document()
 
@@ -84,57 +289,103 @@ def create_document():
 
     doc.add_page_break()
 
-    # Add screenshots with captions
-    current_section = None
-    figure_num = 1
+    writer = StreamingDocxWriter(doc, OUTPUT_FILE, zip_level) if stream else None
+    # The streaming writer handles images itself and keeps the body small
+    pictures = None if writer else PictureInserter(doc)
+
+    try:
+        # Downscale the screenshots to what A4_WIDTH can print at `dpi`
+        image_paths = [SCREENSHOT_DIR / f['filename'] for f in figures if not f.get('duplicate_of')]
+        prepared = {}
+        if dpi:
+            prepared = prepare_images([p for p in image_paths if p.exists()], A4_WIDTH.inches,
+                                      dpi, jobs)
+
+        # Add screenshots with captions
+        current_section = None
+        figure_num = 1
+        figure_numbers = {}  # filename -> figure number, for duplicates to refer to
+
+        for figure in figures:
+            filename = figure['filename']
+            title = figure['title']
+
+            # Determine section from title
+            section_name = title.split(' - ')[0].split(' (continued')[0]
+
+            # Add section heading if new section
+            if section_name != current_section:
+                if current_section is not None:
+                    doc.add_page_break()
+                doc.add_heading(section_name, level=1)
+                current_section = section_name
+
+            # Add the image
+            image_path = SCREENSHOT_DIR / filename
+            if not image_path.exists():
+                print(f"Warning: Image not found: {image_path}")
+                continue
+
+            original = figure_numbers.get(figure.get('duplicate_of'))
+            if original:
+                add_reference(doc, f"{title}: same screen as Figure {original}")
+                print(f"Referenced: {title} -> Figure {original}")
+                continue
+
+            # Add image scaled to A4 width, or to the page height if it's taller
+            try:
+                caption = f"Figure {figure_num}: {title}"
+                fit = figure_fit(figure)
+                add_figure(doc, prepared.get(str(image_path), image_path), caption,
+                           fit.get('width'), fit.get('height'), pictures=pictures)
+                figure['caption'] = caption
+                figure_numbers[filename] = figure_num
+                if writer:
+                    writer.flush()
+
+                print(f"Added: Figure {figure_num} - {title}")
+                figure_num += 1
+
+            except Exception as e:
+                print(f"Error adding image {filename}: {e}")
+
+        # Save document
+        if writer:
+            writer.close()
+        else:
+            save_docx(doc, OUTPUT_FILE, zip_level)
+    except BaseException:
+        # Leave the previous document in place
+        if writer:
+            writer.abort()
+        raise
+
+    # Which media member each figure ended up in, for the next incremental build
+    media = {caption: target for target, caption in iter_media(OUTPUT_FILE)}
+    for figure in figures:
+        figure['media'] = media.get(figure.pop('caption', None))
+    save_record(options, figures)
 
-    for item in screenshots:
-        filename = item['filename']
-        title = item['title']
-
-        # Determine section from title
-        section_name = title.split(' - ')[0].split(' (continued')[0]
-
-        # Add section heading if new section
-        if section_name != current_section:
-            if current_section is not None:
-                doc.add_page_break()
-            doc.add_heading(section_name, level=1)
-            current_section = section_name
-
-        # Add the image
-        image_path = SCREENSHOT_DIR / filename
-        if not image_path.exists():
-            print(f"Warning: Image not found: {image_path}")
-            continue
-
-        # Add image scaled to A4 width
-        try:
-            doc.add_picture(str(image_path), width=A4_WIDTH)
-
-            # Center the image
-            last_paragraph = doc.paragraphs[-1]
-            last_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-
-            # Add caption
-            caption = doc.add_paragraph()
-            caption.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            caption_run = caption.add_run(f"Figure {figure_num}: {title}")
-            caption_run.font.size = Pt(10)
-            caption_run.font.italic = True
-
-            doc.add_paragraph()  # Add spacing
-
-            print(f"Added: Figure {figure_num} - {title}")
-            figure_num += 1
-
-        except Exception as e:
-            print(f"Error adding image {filename}: {e}")
-
-    # Save document
-    doc.save(OUTPUT_FILE)
     print(f"\n✓ Document saved to: {OUTPUT_FILE}")
     print(f"✓ Total figures: {figure_num - 1}")
 
 if __name__ == '__main__':
-    create_document()
+    parser = argparse.ArgumentParser(description="Generate the ISP portal screenshot document.")
+    parser.add_argument('--stream', action='store_true',
+                        help="write the document to disk while building to keep memory flat")
+    parser.add_argument('--zip-level', type=int, default=DEFAULT_XML_LEVEL,
+                        help=f"deflate level for XML parts; media is stored as is (default {DEFAULT_XML_LEVEL})")
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI,
+                        help=f"downscale screenshots to this print resolution; 0 keeps the originals (default {DEFAULT_DPI})")
+    parser.add_argument('--jobs', type=int, metavar='N',
+                        help="processes for image preprocessing (default: one per CPU)")
+    parser.add_argument('--no-stitch', dest='stitch', action='store_false',
+                        help="embed multi-part screenshots as captured instead of stitching them")
+    parser.add_argument('--incremental', action='store_true',
+                        help="skip the build or only swap changed images when the last build record allows")
+    parser.add_argument('--dedup', type=int, nargs='?', const=DEFAULT_MAX_DISTANCE, metavar='BITS',
+                        help="embed near-identical screenshots once, up to BITS apart in perceptual "
+                             f"hash (default {DEFAULT_MAX_DISTANCE})")
+    args = parser.parse_args()
+    create_document(stream=args.stream, zip_level=args.zip_level, dpi=args.dpi, jobs=args.jobs,
+                    stitch=args.stitch, incremental=args.incremental, dedup=args.dedup)
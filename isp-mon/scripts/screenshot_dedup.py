@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Find near-identical screenshots so the document can show each screen once.
+
+take-screenshots.js captures every tab of a page, and the first tab is
+usually what the page shows by default, so settings.png and
+settings_tab_1_general.png differ only in live values such as a clock.
+Each image is shrunk to a small grayscale grid and all difference hashes
+(one bit per pair of horizontal neighbours) are computed in one NumPy pass;
+images within a few bits of an earlier one are grouped under it.
+
+Usage: python screenshot_dedup.py [--max-distance N] IMAGE ...
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 16  # grid rows; the hash has HASH_SIZE**2 bits
+DEFAULT_MAX_DISTANCE = 2  # differing bits; different tabs of one page are 4 or more apart
+BLOCK_ROWS = 256  # hashes compared against all others per step of distances()
+
+# Number of set bits in each byte value
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint16)
+
+def thumbnail(path):
+    """The image as a HASH_SIZE x (HASH_SIZE + 1) grayscale array."""
+    with Image.open(path) as im:
+        im.draft('L', (HASH_SIZE * 8, HASH_SIZE * 8))  # JPEGs decode at reduced size
+        return np.asarray(im.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.BOX),
+                          dtype=np.int16)
+
+def dhashes(grids):
+    """Packed difference hashes of a stack of thumbnails, one row of bytes per image."""
+    bits = grids[:, :, 1:] > grids[:, :, :-1]
+    return np.packbits(bits.reshape(len(grids), -1), axis=1)
+
+def distances(hashes):
+    """Hamming distance between every pair of hashes, as an n x n array."""
+    result = np.empty((len(hashes), len(hashes)), dtype=np.uint16)
+    for start in range(0, len(hashes), BLOCK_ROWS):
+        block = hashes[start:start + BLOCK_ROWS, None, :] ^ hashes[None, :, :]
+        result[start:start + BLOCK_ROWS] = POPCOUNT[block].sum(axis=2)
+    return result
+
+def group_duplicates(hashes, max_distance=DEFAULT_MAX_DISTANCE):
+    """For each hash, the index of the earlier hash it duplicates, or None.
+
+    An image joins the first earlier image within `max_distance` bits that
+    is not itself a duplicate, so groups don't chain.
+    """
+    dist = distances(hashes)
+    kept = np.zeros(len(hashes), dtype=bool)
+    result = []
+    for i in range(len(hashes)):
+        earlier = np.flatnonzero(kept[:i] & (dist[i, :i] <= max_distance))
+        if len(earlier):
+            result.append(int(earlier[0]))
+        else:
+            kept[i] = True
+            result.append(None)
+    return result
+
+def mark_duplicates(figures, screenshot_dir, max_distance=DEFAULT_MAX_DISTANCE, cache_path=None):
+    """Set figure['duplicate_of'] to the filename of the figure it repeats.
+
+    `figures` are manifest entries with a sha256 (None for missing files,
+    which are left alone). Hashes are kept in `cache_path` by sha256, so
+    unchanged screenshots are not decoded again.
+    """
+    cache = {}
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cache = json.load(f)
+
+    present = [f for f in figures if f['sha256']]
+    if not present:
+        return 0
+    missing = [f for f in present if f['sha256'] not in cache]
+    if missing:
+        grids = np.stack([thumbnail(os.path.join(screenshot_dir, f['filename'])) for f in missing])
+        for figure, h in zip(missing, dhashes(grids)):
+            cache[figure['sha256']] = h.tobytes().hex()
+        if cache_path:
+            with open(cache_path, 'w') as f:
+                json.dump(cache, f)
+
+    hashes = np.array([np.frombuffer(bytes.fromhex(cache[f['sha256']]), dtype=np.uint8)
+                       for f in present]).reshape(len(present), -1)
+    for figure, original in zip(present, group_duplicates(hashes, max_distance)):
+        if original is not None:
+            figure['duplicate_of'] = present[original]['filename']
+    return sum(1 for f in present if 'duplicate_of' in f)
+
+def main():
+    parser = argparse.ArgumentParser(description="Group near-identical screenshots.")
+    parser.add_argument('images', nargs='+')
+    parser.add_argument('--max-distance', type=int, default=DEFAULT_MAX_DISTANCE,
+                        help=f"most differing hash bits for a duplicate (default {DEFAULT_MAX_DISTANCE})")
+    args = parser.parse_args()
+
+    hashes = dhashes(np.stack([thumbnail(path) for path in args.images]))
+    for path, original in zip(args.images, group_duplicates(hashes, args.max_distance)):
+        if original is not None:
+            print(f"{path}  duplicates  {args.images[original]}")
+
+if __name__ == '__main__':
+    main()
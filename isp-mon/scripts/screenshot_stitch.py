@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Stitch scrolled screenshot parts (name_part1.png, name_part2.png, ...) into
+one tall image and cut it again at A4 page heights.
+
+take-screenshots.js captures long pages as overlapping viewport shots with a
+fixed header and sidebar repeated in each. For consecutive parts the fixed
+columns are found by comparing the two images, the scroll offset between
+them by matching row hashes of the scrolling area, and only the newly
+scrolled-in rows of each part are appended, with the fixed sidebar stretched
+rather than repeated. The result is sliced between lines of content close to
+the page height, so each slice fits on a page below its heading.
+"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+
+from PIL import Image
+
+PART_RE = re.compile(r'(.+)_part(\d+)\.png$')
+MIN_OVERLAP_ROWS = 20  # fewer matching rows are too likely to be coincidence
+MAX_ROW_REPEATS = 3  # rows seen more often than this (blank background) don't vote
+SLICE_SEARCH = 0.15  # look this far (fraction of the page) above the limit for a cut line
+STITCH_VERSION = 1  # bump when stitch() or reslice() output changes
+
+def rows(im):
+    """The raw bytes of each pixel row of an RGB image."""
+    data = im.tobytes()
+    stride = im.width * 3
+    return [data[y * stride:(y + 1) * stride] for y in range(im.height)]
+
+def scrolling_columns(a, b):
+    """[x0, x1) of the columns that differ between two shots of a page.
+
+    Columns outside it (a fixed sidebar, margins) look the same in every
+    shot and would hide the scroll offset from the row hashes.
+    """
+    cols_a = rows(a.transpose(Image.Transpose.TRANSPOSE))
+    cols_b = rows(b.transpose(Image.Transpose.TRANSPOSE))
+    differing = [x for x, (ca, cb) in enumerate(zip(cols_a, cols_b)) if ca != cb]
+    if not differing:
+        return None
+    return differing[0], differing[-1] + 1
+
+def find_scroll(a, b):
+    """(offset, (x0, x1)): rows the page scrolled between shot `a` and shot `b`
+    and the scrolling columns, or None.
+
+    Each row of `b` votes for the offsets at which the same row (within the
+    scrolling columns) appears in `a`; rows that repeat a lot, such as blank
+    background, are ignored. Fixed rows match at offset 0, which is skipped.
+    """
+    if a.size != b.size:
+        return None
+    columns = scrolling_columns(a, b)
+    if columns is None:
+        return None  # identical shots
+    x0, x1 = columns
+    positions = {}
+    for y, row in enumerate(rows(a)):
+        positions.setdefault(hash(row[x0 * 3:x1 * 3]), []).append(y)
+
+    votes = {}
+    for y, row in enumerate(rows(b)):
+        matches = positions.get(hash(row[x0 * 3:x1 * 3]), [])
+        if len(matches) > MAX_ROW_REPEATS:
+            continue
+        for p in matches:
+            if p > y:
+                votes[p - y] = votes.get(p - y, 0) + 1
+    if not votes:
+        return None
+    offset = max(votes, key=votes.get)
+    if votes[offset] < MIN_OVERLAP_ROWS or votes[offset] * 2 < sum(votes.values()):
+        return None
+    return offset, columns
+
+def extend_fixed(strip, rows_added):
+    """Make a fixed column strip `rows_added` taller, keeping its bottom at the bottom.
+
+    A sidebar footer pinned to the viewport would otherwise show up once per
+    part. The strip is stretched inside its longest run of identical rows
+    (the gap between the menu and the footer); without one the new rows are
+    left to the caller.
+    """
+    strip_rows = rows(strip)
+    best, best_len, run_start = None, 1, 0
+    for y in range(1, strip.height + 1):
+        if y == strip.height or strip_rows[y] != strip_rows[run_start]:
+            if y - run_start > best_len:
+                best, best_len = run_start + (y - run_start) // 2, y - run_start
+            run_start = y
+    if best is None:
+        return None
+    filler = strip.crop((0, best, strip.width, best + 1)).resize((strip.width, rows_added))
+    tall = Image.new('RGB', (strip.width, strip.height + rows_added))
+    tall.paste(strip.crop((0, 0, strip.width, best)), (0, 0))
+    tall.paste(filler, (0, best))
+    tall.paste(strip.crop((0, best, strip.width, strip.height)), (0, best + rows_added))
+    return tall
+
+def stitch(parts):
+    """Join consecutive part images; return the stitched image or None if any pair doesn't overlap."""
+    result = parts[0].convert('RGB')
+    for part in parts[1:]:
+        part = part.convert('RGB')
+        # Compare the new part against the last viewport of what is stitched so far
+        tail = result.crop((0, result.height - part.height, result.width, result.height))
+        scroll = find_scroll(tail, part)
+        if scroll is None:
+            return None
+        offset, (x0, x1) = scroll
+        # The bottom `offset` rows of the new shot are the newly scrolled-in content
+        joined = Image.new('RGB', (result.width, result.height + offset))
+        joined.paste(result, (0, 0))
+        joined.paste(part.crop((0, part.height - offset, part.width, part.height)),
+                     (0, result.height))
+        for left, right in ((0, x0), (x1, result.width)):
+            if left < right:
+                strip = extend_fixed(result.crop((left, 0, right, result.height)), offset)
+                if strip is not None:
+                    joined.paste(strip, (left, 0))
+        result = joined
+    return result
+
+def reslice(im, max_height):
+    """Cut `im` into pieces at most `max_height` tall.
+
+    Each cut is moved up to the nearest row that repeats the row above it,
+    so it runs between lines of text rather than through them.
+    """
+    all_rows = rows(im)
+    pieces = []
+    top = 0
+    while im.height - top > max_height:
+        limit = top + max_height
+        cut = limit
+        for y in range(limit, limit - int(max_height * SLICE_SEARCH), -1):
+            if all_rows[y] == all_rows[y - 1]:
+                cut = y
+                break
+        pieces.append(im.crop((0, top, im.width, cut)))
+        top = cut
+    pieces.append(im.crop((0, top, im.width, im.height)))
+    return pieces
+
+def stitch_key(paths, page_ratio):
+    h = hashlib.sha256(f"{STITCH_VERSION}:{page_ratio}".encode())
+    for path in paths:
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+def stitch_screenshots(screenshots, screenshot_dir, out_dir, page_ratio):
+    """Replace runs of _partN entries in a manifest list with stitched page slices.
+
+    `page_ratio` is the usable page height divided by the figure width.
+    Slices are written to `out_dir`; returned entries name them relative to
+    `screenshot_dir`. Runs that don't overlap are kept as they are. The
+    entries for each run are kept in `out_dir`/<base>.json with a hash of
+    the parts, so unchanged runs are not stitched again.
+    """
+    screenshot_dir = Path(screenshot_dir)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    # Group consecutive parts of the same page
+    groups = []
+    for item in screenshots:
+        m = PART_RE.match(item['filename'])
+        base = m.group(1) if m else None
+        if base and groups and groups[-1][0] == base:
+            groups[-1][1].append(item)
+        else:
+            groups.append((base, [item]))
+
+    result = []
+    for base, items in groups:
+        paths = [screenshot_dir / item['filename'] for item in items]
+        if base is None or len(items) < 2 or not all(p.exists() for p in paths):
+            result.extend(items)
+            continue
+
+        key = stitch_key(paths, page_ratio)
+        index_path = out_dir / f"{base}.json"
+        if index_path.exists():
+            with open(index_path) as f:
+                index = json.load(f)
+            if index['key'] == key and all((screenshot_dir / e['filename']).exists()
+                                           for e in index['entries']):
+                result.extend(index['entries'])
+                continue
+
+        stitched = stitch([Image.open(p) for p in paths])
+        if stitched is None:
+            print(f"Warning: {base} parts don't overlap; keeping them separate")
+            entries = items
+        else:
+            pieces = reslice(stitched, int(stitched.width * page_ratio))
+            title = items[0]['title']
+            entries = []
+            for i, piece in enumerate(pieces, 1):
+                path = out_dir / f"{base}_page{i}.png"
+                piece.save(path, optimize=True)
+                entries.append({
+                    'filename': str(path.relative_to(screenshot_dir)),
+                    'title': title if i == 1 else f"{title} (continued {i})",
+                })
+            print(f"Stitched {len(items)} parts of {base} into {len(pieces)} page(s)")
+        with open(index_path, 'w') as f:
+            json.dump({'key': key, 'entries': entries}, f, indent=2)
+        result.extend(entries)
+    return result
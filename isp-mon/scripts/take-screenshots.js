@@ -1,6 +1,7 @@
 const { chromium } = require('playwright');
 const path = require('path');
 const fs = require('fs');
+const crypto = require('crypto');
 
 const BASE_URL = 'http://localhost:7001';
 const SCREENSHOT_DIR = path.join(__dirname, '..', 'screenshots');
@@ -23,6 +24,18 @@ async function sleep(ms) {
   return new Promise(resolve => setTimeout(resolve, ms));
 }
 
+// Manifest entry with the content hash and pixel size create-word-doc.py
+// compares against its previous build
+function describeScreenshot(filename, title, png) {
+  return {
+    filename,
+    title,
+    sha256: crypto.createHash('sha256').update(png).digest('hex'),
+    width: png.readUInt32BE(16),  // IHDR
+    height: png.readUInt32BE(20),
+  };
+}
+
 async function takeFullPageScreenshots(page, baseName, title) {
   const screenshots = [];
 
@@ -33,8 +46,8 @@ async function takeFullPageScreenshots(page, baseName, title) {
   if (bodyHeight <= VIEWPORT.height) {
     // Single screenshot
     const filename = `${baseName}.png`;
-    await page.screenshot({ path: path.join(SCREENSHOT_DIR, filename) });
-    screenshots.push({ filename, title });
+    const png = await page.screenshot({ path: path.join(SCREENSHOT_DIR, filename) });
+    screenshots.push(describeScreenshot(filename, title, png));
     console.log(`  Captured: ${filename}`);
   } else {
     // Multiple screenshots for scrolling
@@ -46,11 +59,12 @@ async function takeFullPageScreenshots(page, baseName, title) {
       await sleep(300);
 
       const filename = `${baseName}_part${part}.png`;
-      await page.screenshot({ path: path.join(SCREENSHOT_DIR, filename) });
-      screenshots.push({
+      const png = await page.screenshot({ path: path.join(SCREENSHOT_DIR, filename) });
+      screenshots.push(describeScreenshot(
         filename,
-        title: part === 1 ? title : `${title} (continued ${part})`
-      });
+        part === 1 ? title : `${title} (continued ${part})`,
+        png
+      ));
       console.log(`  Captured: ${filename}`);
 
       scrollPosition += viewportHeight - 100; // Overlap for continuity
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Benchmark cv_classifier against per-label keyword chains.
+
+Usage: python bench_cv_classifier.py [LINES ...]
+       (default: 10000 100000 300000)
+
+The synthetic corpus is mostly free text, with section headers, personal
+details, education and employment lines and dates mixed in. The baseline
+answers every label the way the CV scripts used to, with its own
+any(keyword in line) chain or regex search; both must agree on every
+line.
+"""
+
+import random
+import re
+import sys
+import time
+
+from cv_classifier import CASED_KEYWORDS, KEYWORDS, PATTERNS, classify
+
+DEFAULT_SIZES = [10000, 100000, 300000]
+
+HEADERS = ['10. Employment Records:', 'WORK EXPERIENCE', 'Professional Experience', 'EDUCATION',
+           'Education Qualification', '7. Other Training / Certifications', 'CERTIFICATES',
+           'Technical Skills', '11. Subject Matter Specializations', 'PROFILE SUMMARY',
+           'Career Objective', 'LANGUAGES', 'REFERENCE', 'Hobbies', 'Key Projects', 'CONTACT']
+DETAILS = ['3. Date of Birth : 12 March 1994', '4. Nationality : Bangladeshi',
+           '2. Name of Staff : Rakib Hasan', '5. Membership of Professional Associations : N/A',
+           '9. Countries of Work Experience : Bangladesh - 8 years', '1. Proposed Position : Expert']
+EDUCATION = ['B.Sc. in Computer Science and Engineering', 'Daffodil International University',
+             'Higher Secondary Certificate (HSC)', 'Notre Dame College, Dhaka', 'Masters of Business Administration',
+             'Secondary School Certificate Examination', 'Bachelor of Science in EEE']
+EMPLOYMENT = ['Senior Developer | Telcobright Ltd.', 'Support Engineer, CompTech Network System (Pvt) Ltd.',
+              'JAN 2020 - PRESENT', 'MAR 2017 - DEC 2019', '2016 - 2019', '2021', 'Period: May 2021 Till Date',
+              'General Manager, Summit Communications Limited', 'House 12, Road 7, Sector 4, Uttara, Dhaka-1230']
+WORDS = ('designed implemented monitored billing platform network links kafka clickhouse dashboards '
+         'microservices docker kubernetes postgres telecom regulator icx iptsp customers incidents '
+         'latency throughput deployment automation reports team clients support').split()
+
+def make_corpus(lines, seed=1):
+    """`lines` CV lines: mostly free text, with the other kinds mixed in."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(lines):
+        roll = rng.random()
+        if roll < 0.08:
+            corpus.append(rng.choice(HEADERS))
+        elif roll < 0.14:
+            corpus.append(rng.choice(DETAILS))
+        elif roll < 0.24:
+            corpus.append(rng.choice(EDUCATION))
+        elif roll < 0.38:
+            corpus.append(rng.choice(EMPLOYMENT))
+        else:
+            text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 18))).capitalize()
+            if rng.random() < 0.05:
+                text += f" with {rng.randint(2, 15)} years of experience"
+            corpus.append(text + '.')
+    return corpus
+
+LEGACY_PATTERNS = {label: re.compile(pattern, re.IGNORECASE) for label, (_, pattern) in PATTERNS.items()}
+
+def legacy_labels(line):
+    """Every label answered on its own, as the CV scripts did before cv_classifier."""
+    line_lower = line.lower()
+    labels = set()
+    for label, keywords in KEYWORDS.items():
+        if any(k in line_lower for k in keywords):
+            labels.add(label)
+    for label, keywords in CASED_KEYWORDS.items():
+        if any(k in line for k in keywords):
+            labels.add(label)
+    for label, pattern in LEGACY_PATTERNS.items():
+        if pattern.search(line):
+            labels.add(label)
+    return labels
+
+def time_labeller(labeller, corpus):
+    start = time.perf_counter()
+    result = [labeller(line) for line in corpus]
+    return time.perf_counter() - start, result
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    keywords = sum(map(len, KEYWORDS.values())) + sum(map(len, CASED_KEYWORDS.values()))
+    print(f"{len(KEYWORDS) + len(CASED_KEYWORDS) + len(PATTERNS)} labels, {keywords} keywords, "
+          f"{len(PATTERNS)} patterns")
+    print(f"{'lines':>9}  {'chains':>9}  {'classifier':>10}  {'us/line':>8}  {'speedup':>8}")
+    for lines in sizes:
+        corpus = make_corpus(lines)
+        legacy, expected = time_labeller(legacy_labels, corpus)
+        compiled, labels = time_labeller(classify, corpus)
+        mismatches = sum(1 for a, b in zip(expected, labels) if a != b)
+        if mismatches:
+            print(f"{mismatches} of {lines} lines labelled differently")
+            sys.exit(1)
+        print(f"{lines:>9}  {legacy:>8.3f}s  {compiled:>9.3f}s  {compiled / lines * 1e6:>8.2f}  "
+              f"{legacy / compiled:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
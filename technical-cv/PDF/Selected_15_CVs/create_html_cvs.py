@@ -7,6 +7,9 @@ import os
 import re
 from html import escape
 
+from cv_classifier import classify
+from name_resolver import NameResolver
+
 # Position assignments
 positions = {
     'Md. Ariful Haque': 'Solution Architect / System Analyst',
@@ -26,11 +29,10 @@ positions = {
     'S. M. Asif Zawad': 'Trainer / Support Engineer'
 }
 
+position_index = NameResolver(positions)
+
 def get_position(filename):
-    for name, pos in positions.items():
-        if name.lower() in filename.lower():
-            return pos
-    return 'Technical Expert'
+    return position_index.resolve(filename) or 'Technical Expert'
 
 def get_name_from_filename(filename):
     name = filename.replace('.pdf', '').replace('.docx', '').replace(' CV', '').replace('_CV', '').replace(' cv', '')
@@ -46,44 +48,44 @@ def extract_docx_content(filepath):
     for table in doc.tables:
         for row in table.rows:
             cells = [cell.text.strip() for cell in row.cells]
-            row_text = ' '.join(cells).lower()
+            labels = classify(' '.join(cells))
 
-            if 'name of staff' in row_text:
+            if 'name_of_staff' in labels:
                 for cell in cells:
                     if cell and 'name' not in cell.lower() and cell != ':':
                         data['name'] = cell
                         break
-            elif 'date of birth' in row_text:
+            elif 'dob' in labels:
                 for cell in cells:
                     if cell and 'date' not in cell.lower() and cell != ':':
                         data['dob'] = cell
                         break
-            elif 'nationality' in row_text:
+            elif 'nationality' in labels:
                 for cell in cells:
                     if cell and 'nationality' not in cell.lower() and cell != ':':
                         data['nationality'] = cell
                         break
-            elif 'education' in row_text and '6.' in cells[0]:
+            elif 'education' in labels and '6.' in cells[0]:
                 for cell in cells:
                     if cell and 'education' not in cell.lower() and cell != ':':
                         data['education'] = cell
                         break
-            elif 'countries of work' in row_text:
+            elif 'countries_of_work' in labels:
                 for cell in cells:
                     if cell and 'countries' not in cell.lower() and cell != ':':
                         data['experience'] = cell
                         break
-            elif 'language' in row_text and 'proficiency' in row_text:
+            elif 'language' in labels and 'proficiency' in labels:
                 for cell in cells:
                     if cell and 'language' not in cell.lower() and cell != ':':
                         data['languages'] = cell
                         break
-            elif 'training' in row_text and '7.' in cells[0]:
+            elif 'training' in labels and '7.' in cells[0]:
                 for cell in cells:
                     if cell and 'training' not in cell.lower() and cell != ':':
                         data['training'] = cell
                         break
-            elif 'membership' in row_text:
+            elif 'membership' in labels:
                 for cell in cells:
                     if cell and 'membership' not in cell.lower() and cell != ':':
                         data['membership'] = cell
@@ -116,13 +118,13 @@ def extract_pdf_content(filepath):
     # Try to extract structured data from text
     lines = full_text.split('\n')
     for i, line in enumerate(lines):
-        line_lower = line.lower()
-        if 'date of birth' in line_lower:
+        labels = classify(line)
+        if 'dob' in labels:
             if ':' in line:
                 data['dob'] = line.split(':', 1)[1].strip()
             elif i + 1 < len(lines):
                 data['dob'] = lines[i + 1].strip()
-        elif 'nationality' in line_lower:
+        elif 'nationality' in labels:
             if ':' in line:
                 data['nationality'] = line.split(':', 1)[1].strip()
 
@@ -273,19 +275,19 @@ def main():
 
             for line in lines:
                 line_stripped = line.strip()
-                line_lower = line_stripped.lower()
+                labels = classify(line_stripped)
 
                 # Detect sections
-                if any(x in line_lower for x in ['employment record', 'work experience', 'professional experience']):
+                if 'work_history' in labels:
                     current_section = 'employment'
                     continue
-                elif any(x in line_lower for x in ['skill', 'technical expertise', 'computer skill', 'subject matter']):
+                elif labels & {'skill', 'technical_expertise', 'subject_matter'}:
                     current_section = 'skills'
                     continue
-                elif 'education' in line_lower and len(line_stripped) < 50:
+                elif 'education' in labels and len(line_stripped) < 50:
                     current_section = 'education'
                     continue
-                elif any(x in line_lower for x in ['training', 'certification', 'certificate']) and len(line_stripped) < 50:
+                elif labels & {'training', 'certification'} and len(line_stripped) < 50:
                     current_section = 'training'
                     continue
 
@@ -1,12 +1,29 @@
 import sys
 sys.stdout.reconfigure(encoding='utf-8')
 
+import argparse
+import hashlib
+import json
+import traceback
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from docx import Document
 import fitz
 import os
 import re
 from html import escape
 
+from cv_classifier import classify, search
+from name_resolver import AmbiguousName, NameResolver
+
+# Structured data extracted from each CV is cached here as JSON
+CACHE_DIR = '.cv-cache'
+EXTRACTOR_VERSION = 2  # bump when extract_docx_structured() or extract_pdf_content() output changes
+# Modules extraction relies on; editing one invalidates the cache like a version bump
+HELPER_MODULES = ('cv_classifier.py', 'name_resolver.py')
+
 # Position assignments based on careful matching (19 people)
 positions = {
     'Md. Ariful Haque': 'Solution Architect / System Analyst',
@@ -60,18 +77,18 @@ name_mapping = {
     'Md Mahmudur Rahman': 'Md Mahmudur Rahman'
 }
 
+position_index = NameResolver(positions)
+name_index = NameResolver(name_mapping)
+
 def get_position(filename):
-    for name, pos in positions.items():
-        if name.lower() in filename.lower():
-            return pos
-    return 'Technical Expert'
+    return position_index.resolve(filename) or 'Technical Expert'
 
 def get_proper_name(filename):
     """Get proper name from filename"""
     base_name = filename.replace('.pdf', '').replace('.docx', '').strip()
-    for key, value in name_mapping.items():
-        if key.lower() in base_name.lower():
-            return value
+    proper_name = name_index.resolve(base_name)
+    if proper_name:
+        return proper_name
     name = base_name.replace(' CV', '').replace('_CV', '').replace(' cv', '')
     name = re.sub(r'_+', ' ', name)
     return name.strip()
@@ -248,7 +265,7 @@ def extract_docx_structured(filepath):
         elif current_section is None and re.match(r'^\d+\.', first_cell_full.strip()):
             # Numbered employment entry outside of detected section
             # Skip if it's a field label like "Proposed Position", "Name of Staff", etc.
-            if any(skip in first_cell.lower() for skip in ['proposed position', 'name of staff', 'date of birth', 'nationality', 'membership', 'education', 'training', 'language', 'countries']):
+            if classify(first_cell) & FORM_FIELD_LABELS:
                 continue
             emp_entry = first_cell_full
             dates = ''
@@ -262,14 +279,134 @@ def extract_docx_structured(filepath):
 
     return data
 
+# Form rows that are personal details, not numbered employment entries
+FORM_FIELD_LABELS = frozenset(['proposed_position', 'name_of_staff', 'dob', 'nationality', 'membership',
+                               'education', 'training', 'language', 'countries'])
+# Lines with these labels are education wherever they turn up
+EDUCATION_LABELS = frozenset(['institution', 'degree', 'degree_abbreviation', 'school_certificate'])
+DEGREE_LABELS = frozenset(['degree', 'degree_abbreviation', 'certificate_word'])
+
+# Section a PDF header line starts, by the first cv_classifier label it has.
+# None marks sections whose content isn't used.
+PDF_SECTION_LABELS = [
+    ('declaration', None),
+    ('reference', None),
+    ('countries', None),
+    ('language', None),
+    ('contact', None),
+    ('hobbies', None),
+    ('education', 'education'),
+    ('academic', 'education'),
+    ('certifications', 'training'),
+    ('certification', 'training'),
+    ('training', 'training'),
+    ('course', 'training'),
+    ('summary', 'summary'),
+    ('project', 'projects'),
+    ('experience', 'employment'),
+    ('employment', 'employment'),
+    ('skill', 'skills'),
+    ('expertise', 'skills'),
+    ('specialization', 'skills'),
+]
+HEADER_SIZE_RATIO = 1.15  # lines this much larger than the body text are headers
+SPANNING_RATIO = 0.6  # blocks wider than this share of the page span all columns
+MAX_HEADER_LENGTH = 50
+HEADER_NUMBER_RE = re.compile(r'^\d+\.\s*')  # "7. Other Training" in form-style CVs
+
+def pdf_section_for(text):
+    """(True, section) if a header with this text starts a known section, else (False, None)."""
+    labels = classify(text)
+    for label, section in PDF_SECTION_LABELS:
+        if label in labels:
+            return True, section
+    return False, None
+
+def column_edges(boxes):
+    """Left edges of the page's text columns: gaps no box crosses separate them."""
+    edges = []
+    right = None
+    for x0, _, x1, _ in sorted(boxes):
+        if right is None or x0 > right:
+            edges.append(x0)
+            right = x1
+        else:
+            right = max(right, x1)
+    return edges
+
+def page_lines(page):
+    """(text, size, bold) for each line of a page in reading order.
+
+    Blocks that span the page split it into bands; within a band the
+    columns are read left to right, each top to bottom, so a sidebar is read
+    whole instead of interleaved with the main column.
+    """
+    blocks = [b for b in page.get_text('dict', flags=fitz.TEXTFLAGS_TEXT)['blocks'] if b['type'] == 0]
+    max_width = page.rect.width * SPANNING_RATIO
+    spanning = sorted(b['bbox'][1] for b in blocks if b['bbox'][2] - b['bbox'][0] > max_width)
+    edges = column_edges([b['bbox'] for b in blocks if b['bbox'][2] - b['bbox'][0] <= max_width])
+
+    def reading_order(block):
+        x0, y0, x1, _ = block['bbox']
+        if x1 - x0 > max_width:
+            return bisect_right(spanning, y0), -1, y0, x0
+        return bisect_right(spanning, y0), bisect_right(edges, x0), y0, x0
+
+    lines = []
+    for block in sorted(blocks, key=reading_order):
+        for line in block['lines']:
+            spans = [span for span in line['spans'] if span['text'].strip()]
+            if not spans:
+                continue
+            text = ''.join(span['text'] for span in line['spans']).strip()
+            size = max(span['size'] for span in spans)
+            bold = all(span['flags'] & fitz.TEXT_FONT_BOLD for span in spans)
+            lines.append((text, size, bold))
+    return lines
+
+def pdf_sections(lines):
+    """Group PDF lines under the section header above them: {section: [text, ...]}.
+
+    Headers are found by style: short lines that are bold or larger than the
+    body text and name a known section. Other styled lines end the section
+    only if they look like headings themselves (large, capitals, numbered or
+    ending in a colon); bold labels inside a section stay content. A PDF with
+    no styled section headers falls back to short lines with a keyword.
+    """
+    sizes = Counter()
+    for text, size, _ in lines:
+        sizes[round(size, 1)] += len(text)
+    body_size = sizes.most_common(1)[0][0] if sizes else 0
+
+    styled = [len(text) <= MAX_HEADER_LENGTH and (bold or size >= body_size * HEADER_SIZE_RATIO)
+              for text, size, bold in lines]
+    use_style = any(is_styled and pdf_section_for(text)[0]
+                    for (text, _, _), is_styled in zip(lines, styled))
+
+    sections = defaultdict(list)
+    current = None
+    for (text, size, _), is_styled in zip(lines, styled):
+        if use_style:
+            is_header = is_styled
+        else:
+            is_header = len(text.split()) <= 4 and not any(c.isdigit() for c in text)
+        if is_header:
+            known, section = pdf_section_for(text)
+            heading_like = (size >= body_size * HEADER_SIZE_RATIO or text.isupper()
+                            or HEADER_NUMBER_RE.match(text) or text.endswith(':'))
+            if known or (use_style and heading_like):
+                current = section
+                continue
+        if current:
+            sections[current].append(text)
+    return sections
+
 def extract_pdf_content(filepath, filename):
     """Extract data from PDF files and map to template format"""
     doc = fitz.open(filepath)
-    full_text = ''
-
+    lines = []
     for page in doc:
-        full_text += page.get_text() + '\n'
-
+        lines.extend(page_lines(page))
     doc.close()
 
     data = {
@@ -287,104 +424,30 @@ def extract_pdf_content(filepath, filename):
         'skills': ''
     }
 
-    lines = full_text.split('\n')
-
-    # Parse sections - detect section headers more accurately
-    current_section = None
-    education_content = []
-    training_content = []
-    employment_content = []
-    project_content = []
-    skill_content = []
-    summary_content = []
-    certificate_content = []
-
-    # Section header patterns (exact matches for infographic-style CVs)
-    section_headers = {
-        'EDUCATION': 'education',
-        'WORK EXPERIENCE': 'employment',
-        'PROFESSIONAL SKILL': 'skills',
-        'PROFILE SUMMARY': 'summary',
-        'CERTIFICATES': 'training',
-        'CERTIFICATE': 'training',
-        'CERTIFICATES & ONLINE PROGRAMME': 'training',
-        'COURSES': 'courses',
-        'REFERENCE': 'reference',
-        'LANGUAGES': None  # Skip languages section header
-    }
-
-    for i, line in enumerate(lines):
-        line_stripped = line.strip()
-        line_lower = line_stripped.lower()
-
-        if not line_stripped:
-            continue
-
-        # Check for exact section headers (common in infographic CVs)
-        if line_stripped in section_headers:
-            current_section = section_headers[line_stripped]
-            continue
+    texts = [text for text, _, _ in lines]
+    line_labels = {text: classify(text) for text in set(texts)}
+    for i, line_stripped in enumerate(texts):
+        labels = line_labels[line_stripped]
 
         # Detect DOB
-        if 'date of birth' in line_lower:
+        if 'dob' in labels:
             if ':' in line_stripped:
                 data['dob'] = line_stripped.split(':', 1)[1].strip()
-            elif i + 1 < len(lines) and lines[i + 1].strip():
-                data['dob'] = lines[i + 1].strip()
+            elif i + 1 < len(texts):
+                data['dob'] = texts[i + 1]
 
         # Detect years of experience
-        match = re.search(r'(\d+)\+?\s*years?\s*(of)?\s*(experience|it experience)?', line_lower)
-        if match:
+        if 'years' in labels:
+            match = search('years', line_stripped.lower())
             data['work_experience'] = f"Bangladesh - {match.group(0)}"
 
-        # Section detection for traditional formats
-        if current_section is None:
-            if 'education qualification' in line_lower or (line_lower == 'education'):
-                current_section = 'education'
-                continue
-            elif 'professional certificate' in line_lower or ('certification' in line_lower and len(line_stripped) < 30):
-                current_section = 'training'
-                continue
-            elif 'career summary' in line_lower or 'profile summary' in line_lower or 'objective' in line_lower:
-                current_section = 'summary'
-                continue
-            elif 'completed project' in line_lower or 'project:' in line_lower:
-                current_section = 'projects'
-                continue
-            elif 'working experience' in line_lower or ('work experience' in line_lower):
-                current_section = 'employment'
-                continue
-            elif 'technical skill' in line_lower or 'professional skill' in line_lower or (line_lower == 'skill' or line_lower == 'skills'):
-                current_section = 'skills'
-                continue
-
-        # Stop collecting at reference section
-        if current_section == 'reference':
-            continue
-
-        # Collect content
-        if current_section == 'education':
-            education_content.append(line_stripped)
-        elif current_section == 'training':
-            training_content.append(line_stripped)
-        elif current_section == 'courses':
-            training_content.append(line_stripped)  # Add courses to training
-        elif current_section == 'employment':
-            employment_content.append(line_stripped)
-        elif current_section == 'projects':
-            project_content.append(line_stripped)
-        elif current_section == 'skills':
-            skill_content.append(line_stripped)
-        elif current_section == 'summary':
-            summary_content.append(line_stripped)
-
-        # Also detect certification content that may appear outside of detected sections
-        # (common in multi-column PDF layouts)
-        cert_keywords = ['Red Hat', 'SUSE', 'Veeam', 'Cybersecurity', 'IBM -', 'Google Analytics',
-                         'RH124', 'RH134', 'RH294', 'RH354', 'DO180', 'DO280', 'DO288', 'DO316']
-        if any(kw in line_stripped for kw in cert_keywords):
-            if line_stripped not in training_content:
-                training_content.append(line_stripped)
+    sections = pdf_sections(lines)
+    education_content = sections['education']
+    training_content = sections['training']
+    employment_content = sections['employment']
+    project_content = sections['projects']
+    skill_content = sections['skills']
+    summary_content = sections['summary']
 
     # Process education content - parse institution names with degrees
     # Also look for education items that may be mixed into other sections
@@ -392,11 +455,7 @@ def extract_pdf_content(filepath, filename):
 
     # Check employment content for education items too (common in infographic CVs)
     for line in employment_content:
-        if 'University' in line or 'College' in line or 'School' in line:
-            all_education_lines.append(line)
-        if 'Bachelor' in line or 'Masters' in line or 'B.Sc' in line or 'M.Sc' in line:
-            all_education_lines.append(line)
-        if 'Secondary School Certificate' in line or 'Higher Secondary' in line:
+        if line_labels[line] & EDUCATION_LABELS:
             all_education_lines.append(line)
 
     if all_education_lines:
@@ -406,15 +465,16 @@ def extract_pdf_content(filepath, filename):
 
         for line in all_education_lines:
             # Skip dates on their own lines, email addresses, phone numbers
-            if re.match(r'^\d{4}$', line) or '@' in line or line.startswith('+'):
+            labels = line_labels[line]
+            if 'year' in labels or '@' in line or line.startswith('+'):
                 continue
             if len(line) < 5:
                 continue
 
             # Categorize lines
-            if 'Bachelor' in line or 'Masters' in line or 'Certificate' in line or 'B.Sc' in line or 'M.Sc' in line:
+            if labels & DEGREE_LABELS:
                 degrees.append(line)
-            elif 'University' in line or 'College' in line or 'School' in line:
+            elif 'institution' in labels:
                 institutions.append(line)
             else:
                 edu_parsed.append(line)
@@ -445,11 +505,8 @@ def extract_pdf_content(filepath, filename):
         for l in training_content:
             if len(l) < 5 or '@' in l:
                 continue
-            # Skip company names that might be in the section
-            if 'Ltd' in l or 'Limited' in l or 'Company' in l or 'Pvt' in l:
-                continue
-            # Skip reference section content
-            if 'General Manager' in l or 'VP of' in l or 'Chairman' in l:
+            # Skip company names and reference section content
+            if line_labels[l] & {'company', 'referee'}:
                 continue
             # Skip language entries
             if l in ['English (Fluent)', 'Bengali (Native)', 'English', 'Bengali']:
@@ -469,7 +526,7 @@ def extract_pdf_content(filepath, filename):
                 continue
             if 'PRESENT' in line.upper():
                 continue
-            if re.match(r'^(JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC)\s+\d{4}', line, re.IGNORECASE):
+            if 'month_date' in line_labels[line]:
                 continue
             if line.startswith('http') or 'linkedin.com' in line.lower():
                 continue
@@ -491,7 +548,7 @@ def extract_pdf_content(filepath, filename):
             if '@' in line or line.startswith('+'):
                 continue
             # Skip if looks like an address (contains Road, Sector, Dhaka, etc.)
-            if 'Road' in line or 'Sector' in line or 'Dhaka' in line or 'Uttara' in line:
+            if 'address' in line_labels[line]:
                 continue
             # Skip job titles that might be in header
             if 'Engineer' in line and len(line.split()) <= 4:
@@ -524,18 +581,15 @@ def extract_pdf_content(filepath, filename):
             # Skip contact info, education items
             if '@' in line or line.startswith('+') or 'Dhaka-' in line:
                 continue
-            if 'School' in line or 'College' in line or 'University' in line:
-                continue
-            if 'Certificate' in line or 'Bachelor' in line or 'Masters' in line or 'Secondary' in line:
+            labels = line_labels[line]
+            if labels & {'institution', 'certificate_word', 'degree', 'secondary'}:
                 continue
 
             # Detect job entry pattern: "Title | Company"
             if '|' in line:
                 job_lines.append(line)
             # Detect date patterns - with PRESENT or year range
-            elif re.match(r'^(JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC)\s+\d{4}', line, re.IGNORECASE):
-                date_lines.append(line)
-            elif re.match(r'^\d{4}\s*-\s*(PRESENT|\d{4})', line, re.IGNORECASE):
+            elif labels & {'month_date', 'year_range'}:
                 date_lines.append(line)
             elif 'PRESENT' in line.upper():
                 date_lines.append(line)
@@ -588,9 +642,7 @@ def extract_pdf_content(filepath, filename):
             for l in employment_content:
                 if '@' in l or l.startswith('+') or 'Dhaka-' in l:
                     continue
-                if 'School' in l or 'College' in l or 'University' in l:
-                    continue
-                if 'Certificate' in l or 'Bachelor' in l or 'Masters' in l:
+                if line_labels[l] & {'institution', 'certificate_word', 'degree'}:
                     continue
                 if len(l) > 10:
                     filtered.append(l)
@@ -806,10 +858,6 @@ def generate_html(data, position):
 
             lines = filtered_lines
 
-            # Check if content has clear project/role structure
-            role_keywords = ['Developer', 'Engineer', 'Designer', 'Analyst', 'Manager', 'Lead', 'Expert', 'Specialist', 'Architect']
-            project_keywords = ['System', 'Application', 'Website', 'Portal', 'Platform', 'Solution', 'Infrastructure']
-
             current_entry = None
             current_desc = []
 
@@ -817,7 +865,7 @@ def generate_html(data, position):
                 # Check if this line looks like a title/role
                 is_role_title = (
                     len(line) < 100 and
-                    (any(kw in line for kw in role_keywords) or any(kw in line for kw in project_keywords)) and
+                    classify(line) & {'role', 'product'} and
                     not line.endswith(',') and
                     len(line.split()) <= 10
                 )
@@ -1134,50 +1182,132 @@ def generate_html(data, position):
 
     return html
 
-def main():
-    # Remove old HTML files
-    if os.path.exists('HTML_CVs'):
-        for f in os.listdir('HTML_CVs'):
-            os.remove(os.path.join('HTML_CVs', f))
-
-    os.makedirs('HTML_CVs', exist_ok=True)
-
-    files = [f for f in os.listdir('.') if f.endswith(('.pdf', '.docx')) and 'Mustafa' not in f and 'create_' not in f]
-
-    print(f'Processing {len(files)} CV files...\n')
-
-    for filename in files:
-        try:
-            position = get_position(filename)
-            proper_name = get_proper_name(filename)
-
-            print(f'Processing: {filename}')
-            print(f'  Name: {proper_name}')
-            print(f'  Position: {position}')
+def output_name(filename):
+    safe_name = re.sub(r'[<>:"/\\|?*]', '', get_proper_name(filename))
+    return f'{safe_name}.html'
+
+def source_hash(paths):
+    """sha256 of the contents of the files in `paths`, in order."""
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+def cache_key(filename, helpers_hash):
+    """Hash of the CV file's bytes, the name it maps to, EXTRACTOR_VERSION and the helper modules."""
+    h = hashlib.sha256(f'{EXTRACTOR_VERSION}:{helpers_hash}:{filename}:{get_proper_name(filename)}'
+                       .encode('utf-8'))
+    with open(filename, 'rb') as f:
+        h.update(f.read())
+    return h.hexdigest()
+
+def load_entry(key):
+    path = os.path.join(CACHE_DIR, f'{key}.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_entry(key, entry):
+    with open(os.path.join(CACHE_DIR, f'{key}.json'), 'w', encoding='utf-8') as f:
+        json.dump(entry, f, ensure_ascii=False, indent=1)
+
+def convert_cv(filename, data=None):
+    """Render one CV's HTML; return (log lines, output file name, html, data).
+
+    `data` is the CV's cached extraction, if any; otherwise the file is
+    extracted. With --jobs this runs in a worker process, so it reports
+    through the returned log instead of printing, and a failure comes back
+    as the traceback text in the log with no output.
+    """
+    log = [f'Processing: {filename}']
+    try:
+        position = get_position(filename)
+        proper_name = get_proper_name(filename)
+
+        log.append(f'  Name: {proper_name}')
+        log.append(f'  Position: {position}')
+
+        if data is not None:
+            log.append('  Using cached extraction')
+        elif filename.endswith('.docx'):
+            data = extract_docx_structured(filename)
+            if not data.get('name'):
+                data['name'] = proper_name
+        else:
+            data = extract_pdf_content(filename, filename)
 
-            if filename.endswith('.docx'):
-                data = extract_docx_structured(filename)
-                if not data.get('name'):
-                    data['name'] = proper_name
-            else:
-                data = extract_pdf_content(filename, filename)
+        html_content = generate_html(data, position)
+        return log, output_name(filename), html_content, data
 
-            html_content = generate_html(data, position)
+    except Exception as e:
+        log.append(f'  Error: {str(e)}')
+        log.append(traceback.format_exc())
+        return log, None, None, None
 
-            safe_name = re.sub(r'[<>:"/\\|?*]', '', proper_name)
-            output_file = f'HTML_CVs/{safe_name}.html'
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert the CVs in this folder to HTML_CVs/*.html.')
+    parser.add_argument('--jobs', type=int, default=1, metavar='N',
+                        help='convert in N worker processes (0: one per CPU)')
+    args = parser.parse_args(argv)
+    jobs = args.jobs or os.cpu_count()
 
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+    os.makedirs('HTML_CVs', exist_ok=True)
+    os.makedirs(CACHE_DIR, exist_ok=True)
 
-            print(f'  Created: {safe_name}.html\n')
+    # Sorted so the log reads the same whatever the job count
+    files = sorted(f for f in os.listdir('.') if f.endswith(('.pdf', '.docx')) and 'Mustafa' not in f and 'create_' not in f)
 
-        except Exception as e:
-            print(f'  Error: {str(e)}')
-            import traceback
-            traceback.print_exc()
+    # A file that fits two people equally well is reported, not guessed
+    for f in list(files):
+        try:
+            get_position(f)
+            get_proper_name(f)
+        except AmbiguousName as e:
+            print(f'Skipping {f}: {e}')
+            files.remove(f)
+
+    # HTML is current if the CV's extraction is cached and was rendered by this exact
+    # script and helper modules
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    helpers = [os.path.join(script_dir, name) for name in HELPER_MODULES]
+    script_hash = source_hash([os.path.abspath(__file__), *helpers])
+    helpers_hash = source_hash(helpers)
+    keys = {f: cache_key(f, helpers_hash) for f in files}
+    entries = {f: load_entry(keys[f]) for f in files}
+    todo = [f for f in files
+            if not (entries[f] and entries[f]['rendered_with'] == script_hash
+                    and os.path.exists(f'HTML_CVs/{output_name(f)}'))]
+    kept = {output_name(f) for f in files if f not in todo}
+
+    print(f'Processing {len(todo)} of {len(files)} CV files ({len(files) - len(todo)} unchanged)...\n')
+
+    cached = [entries[f]['data'] if entries[f] else None for f in todo]
+    with ProcessPoolExecutor(jobs) if jobs > 1 else nullcontext() as pool:
+        # pool.map yields in input order, so each file's log is printed whole and in turn
+        results = pool.map(convert_cv, todo, cached) if pool else map(convert_cv, todo, cached)
+        for filename, (log, output, html_content, data) in zip(todo, results):
+            print('\n'.join(log))
+            if output:
+                with open(f'HTML_CVs/{output}', 'w', encoding='utf-8') as f:
+                    f.write(html_content)
+                save_entry(keys[filename], {'source': filename, 'rendered_with': script_hash,
+                                            'data': data})
+                kept.add(output)
+                print(f'  Created: {output}')
             print()
 
+    # Drop outputs no CV produced this time, and cache entries of changed or removed CVs
+    for f in sorted(os.listdir('HTML_CVs')):
+        if f not in kept:
+            os.remove(os.path.join('HTML_CVs', f))
+            print(f'Removed stale: {f}')
+    used = {f'{key}.json' for key in keys.values()}
+    for f in os.listdir(CACHE_DIR):
+        if f not in used:
+            os.remove(os.path.join(CACHE_DIR, f))
+
     print('\n=== Created HTML Files ===')
     for f in sorted(os.listdir('HTML_CVs')):
         print(f'  {f}')
@@ -0,0 +1,215 @@
+"""
+Label CV lines by the keywords and patterns they contain, in one pass.
+
+Both CV scripts ask the same questions of every line: does it start a
+section, name a degree or an institution, state years of experience.
+Every keyword of every label is compiled into one Aho-Corasick automaton,
+so a line is scanned once however many keywords there are. Each state
+carries a bitmask of the labels that end there, and the automata for
+keywords in any case and keywords as written are merged, so one pass over
+the original text serves both. The regex labels (dates, years of
+experience) are joined into one alternation per trigger, which only runs
+on lines in which the automaton saw one of its trigger keywords.
+
+    labels = classify(line)
+    if 'education' in labels and len(line) < 50: ...
+    match = search('years', line.lower())
+"""
+
+import re
+from collections import deque
+
+# label -> keywords found in any case
+KEYWORDS = {
+    # Section headers
+    'work_history': ('employment record', 'work experience', 'professional experience'),
+    'employment': ('employment',),
+    'experience': ('experience',),
+    'skill': ('skill',),
+    'expertise': ('expertise',),
+    'technical_expertise': ('technical expertise',),
+    'subject_matter': ('subject matter',),
+    'specialization': ('specialization',),
+    'education': ('education',),
+    'academic': ('academic',),
+    'training': ('training',),
+    'certification': ('certificate', 'certification'),
+    'certifications': ('certificates', 'certifications'),
+    'course': ('course',),
+    'summary': ('summary', 'objective', 'profile'),
+    'project': ('project',),
+    'reference': ('reference',),
+    'language': ('language',),
+    'proficiency': ('proficiency',),
+    'contact': ('contact',),
+    'hobbies': ('hobbies',),
+    'countries': ('countries',),
+    'countries_of_work': ('countries of work',),
+    # Personal details
+    'proposed_position': ('proposed position',),
+    'name_of_staff': ('name of staff',),
+    'dob': ('date of birth',),
+    'nationality': ('nationality',),
+    'membership': ('membership',),
+}
+
+# label -> keywords found only as written
+CASED_KEYWORDS = {
+    'institution': ('University', 'College', 'School'),
+    'degree': ('Bachelor', 'Masters'),
+    'degree_abbreviation': ('B.Sc', 'M.Sc'),
+    'certificate_word': ('Certificate',),
+    'secondary': ('Secondary',),
+    'school_certificate': ('Secondary School Certificate', 'Higher Secondary'),
+    'company': ('Ltd', 'Limited', 'Company', 'Pvt'),
+    'referee': ('General Manager', 'VP of', 'Chairman'),
+    'address': ('Road', 'Sector', 'Dhaka', 'Uttara'),
+    'role': ('Developer', 'Engineer', 'Designer', 'Analyst', 'Manager', 'Lead', 'Expert',
+             'Specialist', 'Architect'),
+    'product': ('System', 'Application', 'Website', 'Portal', 'Platform', 'Solution',
+                'Infrastructure'),
+}
+
+DIGITS = tuple('0123456789')
+
+# label -> (trigger keywords, regex matched ignoring case); the regex can
+# only match lines that contain one of the trigger keywords
+PATTERNS = {
+    'month_date': (DIGITS, r'^(?:JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC)\s+\d{4}'),
+    'year_range': (DIGITS, r'^\d{4}\s*-\s*(?:PRESENT|\d{4})'),
+    'year': (DIGITS, r'^\d{4}$'),
+    'years': (('year',), r'\d+\+?\s*years?\s*(?:of)?\s*(?:experience|it experience)?'),
+    # The signed statement closing form-style CVs, not a list of certifications
+    'declaration': (('certification',), r'^certification:$'),
+}
+
+def build_automaton(keywords):
+    """Transition table and output masks for (keyword, bit) pairs.
+
+    Returns (delta, masks): delta[state] maps a character to the next state
+    (missing characters go back to the root, state 0) and masks[state] is
+    the OR of the bits of every keyword ending at that state. The failure
+    links are folded into delta, so scanning never backtracks.
+    """
+    goto = [{}]
+    masks = [0]
+    for keyword, bit in keywords:
+        state = 0
+        for ch in keyword:
+            if ch not in goto[state]:
+                goto.append({})
+                masks.append(0)
+                goto[state][ch] = len(goto) - 1
+            state = goto[state][ch]
+        masks[state] |= bit
+
+    delta = [None] * len(goto)
+    delta[0] = dict(goto[0])
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        # fail[state] is shallower, so its row of delta is already complete
+        row = dict(delta[fail[state]])
+        row.update(goto[state])
+        delta[state] = row
+        masks[state] |= masks[fail[state]]
+        for ch, child in goto[state].items():
+            fail[child] = delta[fail[state]].get(ch, 0)
+            queue.append(child)
+    return delta, masks
+
+def merge_automata(folded, cased):
+    """One automaton running `folded` on the lowercased text and `cased` on the text as is.
+
+    Its states are the pairs of states the two reach together, built
+    breadth-first from the pair of roots over the characters either one
+    uses, in both cases.
+    """
+    folded_delta, folded_masks = folded
+    cased_delta, cased_masks = cased
+    alphabet = {ch for row in cased_delta for ch in row}
+    for row in folded_delta:
+        for ch in row:
+            alphabet.update((ch, ch.upper()))
+
+    index = {(0, 0): 0}
+    pairs = [(0, 0)]
+    delta = []
+    masks = []
+    for f, c in pairs:  # grows while iterating
+        row = {}
+        for ch in alphabet:
+            pair = (folded_delta[f].get(ch.lower(), 0), cased_delta[c].get(ch, 0))
+            if pair == (0, 0):
+                continue
+            if pair not in index:
+                index[pair] = len(pairs)
+                pairs.append(pair)
+            row[ch] = index[pair]
+        delta.append(row)
+        masks.append(folded_masks[f] | cased_masks[c])
+    return delta, masks
+
+def scan(automaton, text):
+    """OR of the bits of every keyword that occurs in `text`."""
+    delta, masks = automaton
+    state = 0
+    found = 0
+    for ch in text:
+        state = delta[state].get(ch, 0)
+        found |= masks[state]
+    return found
+
+class LineClassifier:
+    """Compiled KEYWORDS, CASED_KEYWORDS and PATTERNS; classify() gives a line's labels."""
+
+    def __init__(self, keywords=KEYWORDS, cased_keywords=CASED_KEYWORDS, patterns=PATTERNS):
+        self.labels = [*keywords, *cased_keywords, *patterns]
+        self.bits = {label: 1 << i for i, label in enumerate(self.labels)}
+
+        # Patterns with the same trigger share one alternation and one trigger bit
+        groups = {}
+        for label, (trigger, pattern) in patterns.items():
+            groups.setdefault(trigger, []).append((label, pattern))
+        self.triggered = []  # (trigger bit, combined regex)
+        triggers = []
+        for i, (trigger, members) in enumerate(groups.items()):
+            bit = 1 << (len(self.labels) + i)
+            triggers.extend((k.lower(), bit) for k in trigger)
+            # A shared leading ^ lets the search stop after the first position
+            anchor = '^' if all(pattern.startswith('^') for _, pattern in members) else ''
+            alternation = '|'.join(f'(?P<{label}>{pattern[len(anchor):]})' for label, pattern in members)
+            self.triggered.append((bit, re.compile(f'{anchor}(?:{alternation})', re.IGNORECASE)))
+
+        folded = build_automaton([(k.lower(), self.bits[label])
+                                  for label, words in keywords.items() for k in words] + triggers)
+        cased = build_automaton((k, self.bits[label])
+                                for label, words in cased_keywords.items() for k in words)
+        self.automaton = merge_automata(folded, cased)
+        self.patterns = {label: re.compile(pattern, re.IGNORECASE)
+                         for label, (_, pattern) in patterns.items()}
+        self.label_mask = (1 << len(self.labels)) - 1
+        self._label_sets = {}
+
+    def classify(self, line):
+        """frozenset of the labels that apply to `line`."""
+        found = scan(self.automaton, line)
+        for bit, combined in self.triggered:
+            if found & bit:
+                for match in combined.finditer(line):
+                    found |= self.bits[match.lastgroup]
+        found &= self.label_mask
+        labels = self._label_sets.get(found)
+        if labels is None:
+            labels = frozenset(label for label in self.labels if found & self.bits[label])
+            self._label_sets[found] = labels
+        return labels
+
+    def search(self, label, line):
+        """re.search() of one pattern label, for its match text."""
+        return self.patterns[label].search(line)
+
+_default = LineClassifier()
+classify = _default.classify
+search = _default.search
@@ -0,0 +1,110 @@
+"""
+Match CV file names to roster entries by the words they share.
+
+A roster maps names ('Md. Ariful Haque', 'tanvirCV') to values (a position,
+a proper name). Names and queries are split into lowercase tokens once, so
+punctuation, underscores, camelCase and word order don't matter. Tokens are
+weighted by how rare they are in the roster: 'md' counts for little,
+'khalilullah' for a lot.
+
+A name matches a query when most of its weight appears in the query
+(MIN_CONTAINMENT), so 'Ariful Haque.pdf' still finds 'Md. Ariful Haque'.
+Matches are ranked by weighted Jaccard similarity, which prefers the name
+that explains most of the query over a shorter one it merely contains. If
+two names with different values come out within AMBIGUITY_MARGIN,
+resolve() raises AmbiguousName rather than guess.
+
+Each name is indexed only under its heaviest tokens, as many as it takes
+to exceed 1 - MIN_CONTAINMENT of its weight. A name that matches must
+share at least one of them with the query, so a lookup only scores names
+reached through those short postings, not the whole roster.
+
+    positions = NameResolver({'Md. Ariful Haque': 'Solution Architect', ...})
+    positions.resolve('Ariful Haque CV.pdf')  # 'Solution Architect'
+"""
+
+import math
+import re
+
+MIN_CONTAINMENT = 0.75  # share of a name's token weight that must appear in the query
+AMBIGUITY_MARGIN = 0.05  # runner-up scores this close to the best are a tie
+NOISE_TOKENS = frozenset(['cv', 'resume', 'pdf', 'docx'])
+
+CAMEL_RE = re.compile(r'([a-z])([A-Z])')
+TOKEN_RE = re.compile(r'[a-z]+|\d+')
+
+class AmbiguousName(LookupError):
+    """A query matches names with different values equally well."""
+
+    def __init__(self, query, values):
+        super().__init__(f"{query!r} matches {' / '.join(map(repr, values))} equally well")
+        self.query = query
+        self.values = values
+
+def tokens(text):
+    """The set of name tokens in `text`: lowercase words, without numbers and NOISE_TOKENS."""
+    words = TOKEN_RE.findall(CAMEL_RE.sub(r'\1 \2', text).lower())
+    return frozenset(w for w in words if not w.isdigit() and w not in NOISE_TOKENS)
+
+class NameResolver:
+    """Inverted index over a {name: value} roster; resolve() finds a query's value."""
+
+    def __init__(self, roster):
+        self.entries = []  # (name, value, tokens)
+        frequency = {}
+        for name, value in roster.items():
+            name_tokens = tokens(name)
+            if name_tokens:
+                self.entries.append((name, value, name_tokens))
+                for token in name_tokens:
+                    frequency[token] = frequency.get(token, 0) + 1
+
+        # Inverse document frequency; tokens no name has get the highest weight
+        n = len(self.entries)
+        self.weights = {token: math.log((n + 1) / count) + 1 for token, count in frequency.items()}
+        self.unknown_weight = math.log(n + 1) + 1
+
+        self.postings = {}
+        for i, (_, _, name_tokens) in enumerate(self.entries):
+            ordered = sorted(name_tokens, key=lambda t: (-self.weights[t], t))
+            total = sum(self.weights[t] for t in ordered)
+            covered = 0
+            for token in ordered:
+                self.postings.setdefault(token, []).append(i)
+                covered += self.weights[token]
+                if covered > (1 - MIN_CONTAINMENT) * total:
+                    break
+
+    def weight(self, token_set):
+        return sum(self.weights.get(t, self.unknown_weight) for t in token_set)
+
+    def matches(self, query):
+        """[(score, name, value)] of the names that match `query`, best first."""
+        query_tokens = tokens(query)
+        candidates = {i for t in query_tokens for i in self.postings.get(t, ())}
+        query_weight = self.weight(query_tokens)
+        result = []
+        for i in candidates:
+            name, value, name_tokens = self.entries[i]
+            shared = self.weight(name_tokens & query_tokens)
+            name_weight = self.weight(name_tokens)
+            if shared >= MIN_CONTAINMENT * name_weight:
+                result.append((shared / (name_weight + query_weight - shared), name, value))
+        result.sort(key=lambda m: (-m[0], m[1]))
+        return result
+
+    def resolve(self, query):
+        """The value of the best matching name, or None if no name matches.
+
+        Raises AmbiguousName if a name with a different value scores within
+        AMBIGUITY_MARGIN of the best.
+        """
+        found = self.matches(query)
+        if not found:
+            return None
+        best_score, _, value = found[0]
+        tied = [v for score, _, v in found if best_score - score <= AMBIGUITY_MARGIN]
+        values = list(dict.fromkeys(tied))
+        if len(values) > 1:
+            raise AmbiguousName(query, values)
+        return value